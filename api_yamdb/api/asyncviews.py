@@ -0,0 +1,98 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from .metrics import track_queries
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadPool:
+    """
+    Ограниченный пул потоков для чтения в режиме ASGI. У каждого потока
+    своё соединение с БД, так что размер пула ограничивает и их число.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def get(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_READ_THREADS,
+                    thread_name_prefix='yamdb-read',
+                )
+            return self.executor
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+
+read_pool = ReadPool()
+
+
+def call_view(view, request, args, kwargs):
+    """Синхронный view с подсчётом запросов и рендерингом ответа."""
+    with track_queries():
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+    return response
+
+
+def call_pooled(view, request, args, kwargs):
+    """
+    Запуск в потоке пула. Сигналы request_started/finished закрывают
+    соединения только своего потока, поэтому здесь это делается вручную.
+    """
+    close_old_connections()
+    try:
+        return call_view(view, request, args, kwargs)
+    finally:
+        close_old_connections()
+
+
+def async_read(view):
+    """
+    Async-обёртка над view вьюсета: GET, HEAD и OPTIONS выполняются
+    в пуле read_pool и не ждут друг друга, запись идёт так же,
+    как синхронные view под ASGI.
+    """
+    write = sync_to_async(call_view, thread_sensitive=True)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await write(view, request, args, kwargs)
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            read_pool.get(),
+            functools.partial(
+                context.run, call_pooled, view, request, args, kwargs
+            ),
+        )
+
+    return wrapper
+
+
+def async_read_routes(patterns, basenames):
+    """Маршруты роутера, где view вьюсетов basenames обёрнуты async_read."""
+    return [
+        URLPattern(pattern.pattern, async_read(pattern.callback),
+                   pattern.default_args, pattern.name)
+        if (pattern.name or '').rsplit('-', 1)[0] in basenames
+        else pattern
+        for pattern in patterns
+    ]
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+VERSION_CLAIM = 'ver'
+VERSION_KEY = 'auth:version:{}'
+
+
+class ClaimsAccessToken(AccessToken):
+    """Токен доступа с именем, ролью, флагами и версией пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[VERSION_CLAIM] = user.token_version
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+def get_token_version(pk):
+    """
+    Версия токенов активного пользователя, None - удалён или неактивен.
+    Кэшируется на AUTH_VERSION_CACHE_TIMEOUT секунд, отсутствие
+    пользователя не кэшируется: при промахе кэша решает БД.
+    """
+    key = VERSION_KEY.format(pk)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=pk, is_active=True).values_list(
+            'token_version', flat=True
+        ).first()
+        if version is not None:
+            cache.set(key, version, settings.AUTH_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def forget_token_versions(pks):
+    """Сбрасывает кэш версий после фиксации транзакции с изменениями."""
+    keys = [VERSION_KEY.format(pk) for pk in pks]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    forget_token_versions([instance.pk])
+
+
+def user_from_claims(pk, token):
+    """Пользователь, собранный из claims токена без чтения всей строки."""
+    user = User(
+        pk=pk,
+        is_active=True,
+        token_version=token[VERSION_CLAIM],
+        **{claim: token[claim] for claim in CLAIMS}
+    )
+    user._state.adding = False
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Берёт пользователя из claims токена и сверяет только версию токена
+    активного пользователя из кэша (при промахе - из БД): удаление,
+    блокировка или смена роли увеличивают её, и выпущенные раньше
+    токены отклоняются.
+    Токены без claims сверяются с полной строкой пользователя.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            pk = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Токен не содержит идентификатора пользователя'
+            )
+        if all(claim in validated_token
+               for claim in CLAIMS + (VERSION_CLAIM,)):
+            self.check_version(pk, validated_token[VERSION_CLAIM])
+            return user_from_claims(pk, validated_token)
+        user = User.objects.filter(pk=pk).first()
+        if user is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден', code='user_not_found'
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен', code='user_inactive'
+            )
+        return user
+
+    def check_version(self, pk, version):
+        current = get_token_version(pk)
+        if current is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден или неактивен',
+                code='user_not_found',
+            )
+        if current != version:
+            raise InvalidToken('Токен отозван')
@@ -0,0 +1,223 @@
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from reviews.models import Category, Genre, SearchEntry, Title
+from reviews.search import index_objects
+
+from .cache import invalidate
+from .serializers import SlugItemBulkSerializer, TitleBulkSerializer
+
+BATCH_SIZE = 500
+CREATED = 'created'
+UPDATED = 'updated'
+
+
+def does_not_exist(value):
+    return serializers.SlugRelatedField.default_error_messages[
+        'does_not_exist'
+    ].format(slug_name='slug', value=value)
+
+
+def bulk_create_with_ids(model, objs):
+    """
+    bulk_create, после которого у объектов есть pk. СУБД без RETURNING
+    (SQLite) не возвращает id вставленных строк, там объекты сохраняются
+    по одному: pk выдаёт сама БД, параллельные пачки не пересекаются.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+        return
+    for obj in objs:
+        obj.save(force_insert=True)
+
+
+class BulkWriteMixin:
+    """
+    Пакетная запись: POST <ресурс>/bulk/ создаёт объекты, PUT создаёт
+    новые и полностью заменяет существующие. Пачка целиком проверяется
+    до записи, связи разрешаются одним запросом на модель, запись идёт
+    в одной транзакции. При ошибках отвечает 400 со списком ошибок
+    по элементам в порядке запроса.
+
+    Наследник задаёт bulk_serializer_class и определяет
+    check_bulk(data, errors, upsert) - проверки всей пачки (дубликаты,
+    ссылки на другие объекты), ошибки добавляются через add_error,
+    и write_bulk(data) - запись проверенной пачки, возвращает статусы
+    элементов. Реализации: SlugBulkWriteMixin и TitleBulkWriteMixin.
+    """
+
+    bulk_serializer_class = None
+
+    @action(methods=['post', 'put'], detail=False, url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Ожидается непустой список объектов.'
+            ]})
+        if len(items) > settings.BULK_MAX_ITEMS:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Не больше {settings.BULK_MAX_ITEMS} объектов за запрос.'
+            ]})
+        upsert = request.method == 'PUT'
+        child = self.bulk_serializer_class(
+            context=self.get_serializer_context()
+        )
+        data, errors = [], []
+        for item in items:
+            try:
+                data.append(child.run_validation(item))
+                errors.append({})
+            except ValidationError as error:
+                data.append(None)
+                errors.append(error.detail)
+        self.check_bulk(data, errors, upsert)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            results = self.write_bulk(data)
+        return Response(
+            results,
+            status=status.HTTP_200_OK if upsert else status.HTTP_201_CREATED
+        )
+
+    def add_error(self, errors, index, field, message):
+        errors[index].setdefault(field, []).append(message)
+
+
+class SlugBulkWriteMixin(BulkWriteMixin):
+    """Пакетная запись жанров и категорий по slug."""
+
+    bulk_serializer_class = SlugItemBulkSerializer
+    # Фильтр произведений, чьё представление меняется вместе с объектом.
+    bulk_titles_lookup = None
+
+    def check_bulk(self, data, errors, upsert):
+        model = self.get_queryset().model
+        slugs = [item['slug'] for item in data if item]
+        self.bulk_existing = dict(
+            model.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+        )
+        seen = set()
+        for index, item in enumerate(data):
+            if item is None:
+                continue
+            if item['slug'] in seen:
+                self.add_error(errors, index, 'slug',
+                               'slug повторяется в запросе.')
+            elif not upsert and item['slug'] in self.bulk_existing:
+                self.add_error(errors, index, 'slug',
+                               'Объект с таким slug уже существует.')
+            seen.add(item['slug'])
+
+    def write_bulk(self, data):
+        model = self.get_queryset().model
+        existing = self.bulk_existing
+        created = [model(name=item['name'], slug=item['slug'])
+                   for item in data if item['slug'] not in existing]
+        updated = [model(pk=existing[item['slug']], name=item['name'],
+                         slug=item['slug'])
+                   for item in data if item['slug'] in existing]
+        model.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        model.objects.bulk_update(updated, ('name',), batch_size=BATCH_SIZE)
+        groups = [self.get_cache_group()]
+        if updated:
+            title_ids = set(Title.objects.filter(**{
+                self.bulk_titles_lookup: [obj.pk for obj in updated]
+            }).values_list('pk', flat=True))
+            if title_ids:
+                groups += ['titles',
+                           *(f'titles:{title_id}' for title_id in title_ids)]
+        invalidate(*groups)
+        return [
+            {'slug': item['slug'],
+             'status': UPDATED if item['slug'] in existing else CREATED}
+            for item in data
+        ]
+
+
+class TitleBulkWriteMixin(BulkWriteMixin):
+    """Пакетная запись произведений с категориями и жанрами по slug."""
+
+    bulk_serializer_class = TitleBulkSerializer
+
+    def check_bulk(self, data, errors, upsert):
+        items = [item for item in data if item]
+        self.bulk_categories = dict(Category.objects.filter(
+            slug__in={item['category'] for item in items}
+        ).values_list('slug', 'pk'))
+        self.bulk_genres = dict(Genre.objects.filter(
+            slug__in={slug for item in items for slug in item['genre']}
+        ).values_list('slug', 'pk'))
+        ids = [item['id'] for item in items if 'id' in item]
+        existing = set()
+        if upsert and ids:
+            existing = set(Title.objects.filter(pk__in=ids)
+                           .values_list('pk', flat=True))
+        seen = set()
+        for index, item in enumerate(data):
+            if item is None:
+                continue
+            self.check_relations(errors, index, item)
+            if 'id' in item:
+                self.check_id(errors, index, item['id'], upsert,
+                              existing, seen)
+
+    def check_relations(self, errors, index, item):
+        if item['category'] not in self.bulk_categories:
+            self.add_error(errors, index, 'category',
+                           does_not_exist(item['category']))
+        for slug in item['genre']:
+            if slug not in self.bulk_genres:
+                self.add_error(errors, index, 'genre', does_not_exist(slug))
+
+    def check_id(self, errors, index, pk, upsert, existing, seen):
+        if not upsert:
+            self.add_error(errors, index, 'id',
+                           'id указывается только при обновлении (PUT).')
+        elif pk not in existing:
+            self.add_error(errors, index, 'id',
+                           f'Произведение с id={pk} не найдено.')
+        elif pk in seen:
+            self.add_error(errors, index, 'id', 'id повторяется в запросе.')
+        seen.add(pk)
+
+    def write_bulk(self, data):
+        titles = [
+            Title(
+                pk=item.get('id'),
+                name=item['name'],
+                year=item['year'],
+                description=item['description'],
+                category_id=self.bulk_categories[item['category']],
+            )
+            for item in data
+        ]
+        created = [title for title in titles if title.pk is None]
+        updated = [title for title in titles if title.pk is not None]
+        bulk_create_with_ids(Title, created)
+        Title.objects.bulk_update(
+            updated, ('name', 'year', 'description', 'category'),
+            batch_size=BATCH_SIZE
+        )
+        through = Title.genre.through
+        through.objects.filter(
+            title_id__in=[title.pk for title in updated]
+        ).delete()
+        through.objects.bulk_create([
+            through(title_id=title.pk, genre_id=self.bulk_genres[slug])
+            for title, item in zip(titles, data)
+            for slug in dict.fromkeys(item['genre'])
+        ], batch_size=BATCH_SIZE)
+        index_objects(SearchEntry.TITLE, titles)
+        invalidate('titles', *(f'titles:{title.pk}' for title in updated),
+                   *(['ranking'] if updated else []))
+        return [
+            {'id': title.pk,
+             'status': UPDATED if 'id' in item else CREATED}
+            for title, item in zip(titles, data)
+        ]
@@ -0,0 +1,152 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}:{}'
+STATS_KEY = 'api:stats:{}'
+EXISTS_KEY = 'api:exists:{}:{}'
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def get_versions(groups):
+    """
+    Версии групп кэша. Версия - метка времени последнего изменения в мс;
+    отсутствующая в кэше версия заводится заново текущим временем.
+    """
+    keys = [VERSION_KEY.format(group) for group in groups]
+    versions = cache.get_many(keys)
+    missing = {key: now_ms() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*groups):
+    """Сдвигает версии групп после фиксации текущей транзакции."""
+    keys = [VERSION_KEY.format(group) for group in groups]
+
+    def bump():
+        now = now_ms()
+        versions = cache.get_many(keys)
+        cache.set_many(
+            {key: max(now, versions.get(key, 0) + 1) for key in keys}, None
+        )
+
+    transaction.on_commit(bump)
+
+
+def exists_cached(groups, queryset):
+    """
+    queryset.exists() с кэшем положительного ответа на
+    PARENT_CACHE_TIMEOUT секунд. Ключ включает версии групп,
+    поэтому удаление объекта через API сразу сбрасывает запись.
+    """
+    if not settings.PARENT_CACHE_TIMEOUT:
+        return queryset.exists()
+    key = EXISTS_KEY.format(
+        '.'.join(map(str, get_versions(groups))), ':'.join(groups)
+    )
+    if cache.get(key):
+        return True
+    exists = queryset.exists()
+    if exists:
+        cache.set(key, True, settings.PARENT_CACHE_TIMEOUT)
+    return exists
+
+
+def record(outcome):
+    key = STATS_KEY.format(outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кэша ответов."""
+    stats = cache.get_many([STATS_KEY.format('hits'),
+                            STATS_KEY.format('misses')])
+    return {
+        'hits': stats.get(STATS_KEY.format('hits'), 0),
+        'misses': stats.get(STATS_KEY.format('misses'), 0),
+    }
+
+
+class CacheGroupsMixin:
+    """
+    Группы кэша вьюсета: список - `cache_group`,
+    объект - `cache_group:<lookup>`. Обе сбрасывают сигналы моделей
+    из api.signals при любой записи, не только через API.
+    """
+
+    cache_group = None
+
+    def get_cache_group(self):
+        return self.cache_group
+
+    def get_cache_groups(self):
+        group = self.get_cache_group()
+        if self.detail:
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            return [f'{group}:{lookup}']
+        return [group]
+
+
+class CachedResponseMixin(CacheGroupsMixin):
+    """
+    Кэширует ответы list и retrieve по адресу запроса
+    (путь, query string, номер страницы) на API_CACHE_TIMEOUT секунд.
+    """
+
+    def get_data_version(self):
+        """
+        Версия данных из БД для ключа: для данных, которые пишет другой
+        процесс, а версии групп в locmem видны только своему.
+        По умолчанию нет.
+        """
+
+    def get_cache_key(self):
+        versions = get_versions(self.get_cache_groups())
+        data_version = self.get_data_version()
+        if data_version is not None:
+            versions.append(data_version)
+        versions = '.'.join(map(str, versions))
+        digest = hashlib.md5(
+            self.request.build_absolute_uri().encode()
+        ).hexdigest()
+        return RESPONSE_KEY.format(versions, digest)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not settings.API_CACHE_TIMEOUT:
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key()
+        data = cache.get(key)
+        if data is not None:
+            record('hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        record('misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
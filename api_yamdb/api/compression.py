@@ -0,0 +1,100 @@
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+
+
+class GzipEncoder:
+    """Потоковое сжатие gzip."""
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def chunk(self, data):
+        """Сжатая часть, которую клиент может сразу распаковать."""
+        return (self.compressor.compress(data)
+                + self.compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+    """Потоковое сжатие brotli."""
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def chunk(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+ENCODERS = {GZIP: GzipEncoder, BROTLI: BrotliEncoder}
+
+
+def available():
+    """Кодировки из COMPRESSION_ENCODINGS в порядке предпочтения сервера."""
+    return [encoding for encoding in settings.COMPRESSION_ENCODINGS
+            if encoding in ENCODERS
+            and (encoding != BROTLI or brotli is not None)]
+
+
+def accepted(header):
+    """Кодировки из Accept-Encoding и их веса q."""
+    weights = {}
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name:
+            weights[name.lower()] = weight
+    return weights
+
+
+def negotiate(header):
+    """
+    Кодировка с наибольшим q из Accept-Encoding, при равных весах -
+    первая в COMPRESSION_ENCODINGS. None, если сжимать нечем.
+    """
+    weights = accepted(header)
+    best, best_weight = None, 0.0
+    for encoding in available():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(encoding, content):
+    encoder = ENCODERS[encoding]()
+    return encoder.chunk(content) + encoder.finish()
+
+
+def compress_stream(encoding, chunks):
+    """Сжимает поток по частям, не накапливая его в памяти."""
+    encoder = ENCODERS[encoding]()
+    for chunk in chunks:
+        data = encoder.chunk(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
@@ -1,5 +1,5 @@
 from django_filters import rest_framework as filters
-from reviews.models import Title
+from reviews.models import Title, TitleRanking
 
 
 class TitleFilter(filters.FilterSet):
@@ -19,3 +19,25 @@ class TitleFilter(filters.FilterSet):
     class Meta:
         model = Title
         fields = ('name', 'year', 'genre', 'category')
+
+
+class TitleRankingFilter(filters.FilterSet):
+    """Те же фильтры, что у TitleFilter, для мест в рейтинге."""
+    name = filters.CharFilter(
+        field_name='title__name',
+        lookup_expr='contains'
+    )
+    year = filters.NumberFilter(field_name='title__year')
+    category = filters.CharFilter(
+        field_name='title__category__slug',
+        lookup_expr='contains'
+    )
+    genre = filters.CharFilter(
+        field_name='title__genre__slug',
+        lookup_expr='contains',
+        distinct=True
+    )
+
+    class Meta:
+        model = TitleRanking
+        fields = ('name', 'year', 'genre', 'category')
@@ -0,0 +1,467 @@
+import json
+import statistics
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from api.authentication import ClaimsAccessToken
+from api.management.commands.benchmark_filters import percentile
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Comment, Genre, Review, Title, User
+
+# Маршрут: имя, HTTP-метод, роль клиента и запросы (путь, тело) по итерациям.
+Route = namedtuple('Route', 'name method user requests')
+
+PREFIX = '/api/v1'
+
+
+class Command(BaseCommand):
+    help = ("Нагрузочный прогон всех маршрутов API: задержки p50/p95/p99, "
+            "запросы к БД на запрос и пропускная способность в JSON. "
+            "Через тестовый клиент все изменения откатываются; с --base-url "
+            "запросы идут на запущенный сервер и проверяются только GET "
+            "по его данным, созданные для замера пользователи удаляются.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--titles', type=int, default=0,
+            help='Предварительно создать N произведений командой seed_data.'
+        )
+        parser.add_argument('--reviews-per-title', type=int, default=10)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Количество замеряемых запросов на маршрут.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Незамеряемые запросы к маршруту перед замером.'
+        )
+        parser.add_argument(
+            '--base-url',
+            help='Адрес запущенного сервера, например http://127.0.0.1:8000.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Одновременных соединений с --base-url, чтобы сравнить '
+                 'пропускную способность WSGI и ASGI.'
+        )
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Отключить кэш ответов каталога (API_CACHE_TIMEOUT=0).'
+        )
+        parser.add_argument(
+            '--only', action='append', default=[],
+            help='Прогнать только маршруты, имя которых содержит подстроку.'
+        )
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+        parser.add_argument(
+            '--compare',
+            help='JSON-отчёт предыдущего прогона для сравнения.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый относительный рост p95, по умолчанию 20%%.'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Завершиться с ошибкой, если найдена регрессия.'
+        )
+
+    def check_options(self, options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть больше нуля.')
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency должен быть больше нуля.')
+        if options['concurrency'] > 1 and not options['base_url']:
+            raise CommandError('--concurrency работает только с --base-url.')
+        if options['titles'] and options['base_url']:
+            raise CommandError(
+                '--titles не работает с --base-url: замер идёт по данным '
+                'сервера, заполните их заранее командой seed_data.'
+            )
+
+    def handle(self, *args, **options):
+        self.check_options(options)
+        self.options = options
+        self.base_url = (options['base_url'] or '').rstrip('/')
+        # Через тестовый клиент все запросы идут с одного адреса
+        # и пользователя, ограничения записи здесь не нужны.
+        overrides = {} if self.base_url else {'THROTTLE_ENABLED': False}
+        if options['no_cache']:
+            overrides['API_CACHE_TIMEOUT'] = 0
+        settings_override = override_settings(**overrides)
+        with settings_override:
+            if self.base_url:
+                try:
+                    self.seed()
+                    report = self.run()
+                finally:
+                    self.cleanup()
+            else:
+                with transaction.atomic():
+                    self.seed()
+                    report = self.run()
+                    transaction.set_rollback(True)
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Отчёт записан в {options['output']}")
+        if options['compare']:
+            with open(options['compare'], encoding='utf8') as baseline:
+                regressions = self.compare(json.load(baseline), report)
+            if regressions and options['fail_on_regression']:
+                raise CommandError(
+                    f"Регрессии: {', '.join(regressions)}"
+                )
+
+    def seed(self):
+        self.created_users = []
+        if self.options['titles']:
+            call_command(
+                'seed_data',
+                titles=self.options['titles'],
+                reviews_per_title=self.options['reviews_per_title'],
+                comments_per_review=self.options['comments_per_review'],
+                stdout=self.stdout,
+            )
+        self.admin = self.get_user(
+            'bench-admin', email='bench-admin@yamdb.fake', role=User.ADMIN
+        )
+        self.reader = self.get_user(
+            'bench-reader', email='bench-reader@yamdb.fake'
+        )
+        self.comment = (Comment.objects.select_related('review__title')
+                        .order_by('pk').last())
+        if self.comment is None:
+            raise CommandError(
+                'Нет данных: запустите команду с --titles или seed_data.'
+            )
+        self.review = self.comment.review
+        self.title = self.review.title
+
+    def get_user(self, username, **defaults):
+        user, created = User.objects.get_or_create(
+            username=username, defaults=defaults
+        )
+        if created:
+            self.created_users.append(user.pk)
+        return user
+
+    def cleanup(self):
+        """Удаляет из БД сервера пользователей, созданных для замера."""
+        User.objects.filter(pk__in=self.created_users).delete()
+
+    def run(self):
+        dataset = {
+            'titles': Title.objects.count(),
+            'reviews': Review.objects.count(),
+            'comments': Comment.objects.count(),
+        }
+        routes = [route for route in self.get_routes()
+                  if not self.options['only']
+                  or any(part in route.name for part in self.options['only'])]
+        tokens = {
+            None: None,
+            'reader': ClaimsAccessToken.for_user(self.reader),
+            'admin': ClaimsAccessToken.for_user(self.admin),
+        }
+        started = time.monotonic()
+        results = {}
+        for route in routes:
+            self.stdout.write(f"  {route.name}")
+            results[route.name] = self.measure(route, tokens[route.user])
+        elapsed = time.monotonic() - started
+        total = sum(result['requests'] for result in results.values())
+        return {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'mode': self.base_url or 'test-client',
+                'vendor': connection.vendor,
+                'cache': not self.options['no_cache'],
+                'concurrency': self.options['concurrency'],
+                **dataset,
+                'requests_per_route': self.options['requests'],
+            },
+            'routes': results,
+            'total': {
+                'requests': total,
+                'seconds': round(elapsed, 3),
+                'throughput_rps': round(total / elapsed, 1) if total else 0,
+            },
+        }
+
+    def get_routes(self):
+        """
+        Маршруты замера. Записи и объекты для маршрутов удаления
+        создаются только через тестовый клиент, в откатываемой транзакции.
+        """
+        count = self.options['requests'] + self.options['warmup']
+        title = f'{PREFIX}/titles/{self.title.pk}'
+        review = f'{title}/reviews/{self.review.pk}'
+        comment = f'{review}/comments/{self.comment.pk}'
+        genre = Genre.objects.order_by('pk').last()
+        run = int(time.time())
+
+        def same(path, data=None):
+            return [(path, data)] * count
+
+        def numbered(path, data=None):
+            return [(path.format(i=i), data and {
+                key: str(value).format(i=i) for key, value in data.items()
+            }) for i in range(count)]
+
+        routes = [
+            Route('titles list', 'get', None, same(f'{PREFIX}/titles/')),
+            Route('titles filter', 'get', None, same(
+                f'{PREFIX}/titles/?genre={genre.slug}&year={self.title.year}'
+            )),
+            Route('titles detail', 'get', None, same(f'{title}/')),
+            Route('genres list', 'get', None, same(f'{PREFIX}/genres/')),
+            Route('categories list', 'get', None,
+                  same(f'{PREFIX}/categories/')),
+            Route('reviews list', 'get', None, same(f'{title}/reviews/')),
+            Route('reviews cursor', 'get', None,
+                  same(f'{title}/reviews/?pagination=cursor')),
+            Route('reviews detail', 'get', None, same(f'{review}/')),
+            Route('comments list', 'get', None, same(f'{review}/comments/')),
+            Route('comments detail', 'get', None, same(f'{comment}/')),
+            Route('users list', 'get', 'admin', same(f'{PREFIX}/users/')),
+            Route('users detail', 'get', 'admin',
+                  same(f'{PREFIX}/users/{self.reader.username}/')),
+            Route('users me', 'get', 'reader', same(f'{PREFIX}/users/me/')),
+            Route('search', 'get', None, same(
+                f'{PREFIX}/search/?q={self.title.name.split()[0]}'
+            )),
+            Route('cache stats', 'get', 'admin',
+                  same(f'{PREFIX}/cache/stats/')),
+        ]
+        if self.base_url:
+            return routes
+        return routes + [
+            Route('genres create', 'post', 'admin', numbered(
+                f'{PREFIX}/genres/',
+                {'name': 'Жанр {i}', 'slug': f'bench-{run}-{{i}}'},
+            )),
+            Route('genres delete', 'delete', 'admin', numbered(
+                f'{PREFIX}/genres/bench-{run}-{{i}}/'
+            )),
+            Route('categories create', 'post', 'admin', numbered(
+                f'{PREFIX}/categories/',
+                {'name': 'Категория {i}', 'slug': f'bench-{run}-{{i}}'},
+            )),
+            Route('categories delete', 'delete', 'admin', numbered(
+                f'{PREFIX}/categories/bench-{run}-{{i}}/'
+            )),
+            Route('titles create', 'post', 'admin', same(
+                f'{PREFIX}/titles/', {
+                    'name': 'Новое произведение', 'year': 2000,
+                    'category': self.title.category.slug,
+                    'genre': [genre.slug],
+                },
+            )),
+            Route('titles update', 'patch', 'admin',
+                  same(f'{title}/', {'description': 'Обновлено'})),
+            Route('titles delete', 'delete', 'admin', [
+                (f'{PREFIX}/titles/{pk}/', None)
+                for pk in self.create_titles(count)
+            ]),
+            Route('reviews create', 'post', 'reader', [
+                (f'{PREFIX}/titles/{pk}/reviews/',
+                 {'text': 'Замер', 'score': 7})
+                for pk in self.create_titles(count)
+            ]),
+            Route('reviews update', 'patch', 'admin',
+                  same(f'{review}/', {'score': 5})),
+            Route('reviews delete', 'delete', 'admin', [
+                (f'{PREFIX}/titles/{obj.title_id}/reviews/{obj.pk}/',
+                 None)
+                for obj in self.create_reviews(count)
+            ]),
+            Route('comments create', 'post', 'reader',
+                  same(f'{review}/comments/', {'text': 'Замер'})),
+            Route('comments update', 'patch', 'admin',
+                  same(f'{comment}/', {'text': 'Обновлено'})),
+            Route('comments delete', 'delete', 'admin', [
+                (f'{review}/comments/{pk}/', None)
+                for pk in self.create_comments(count)
+            ]),
+            Route('users create', 'post', 'admin', numbered(
+                f'{PREFIX}/users/', {
+                    'username': f'bench-{run}-{{i}}',
+                    'email': f'bench-{run}-{{i}}@yamdb.fake',
+                },
+            )),
+            Route('users update', 'patch', 'admin', same(
+                f'{PREFIX}/users/{self.reader.username}/', {'bio': 'Замер'}
+            )),
+            Route('users delete', 'delete', 'admin', numbered(
+                f'{PREFIX}/users/bench-{run}-{{i}}/'
+            )),
+            Route('users me update', 'patch', 'reader',
+                  same(f'{PREFIX}/users/me/', {'bio': 'Замер'})),
+            Route('auth signup', 'post', None, numbered(
+                f'{PREFIX}/auth/signup/', {
+                    'username': f'signup-{run}-{{i}}',
+                    'email': f'signup-{run}-{{i}}@yamdb.fake',
+                },
+            )),
+            Route('auth token', 'post', None, same(
+                f'{PREFIX}/auth/token/', {
+                    'username': self.reader.username,
+                    'confirmation_code':
+                        default_token_generator.make_token(self.reader),
+                },
+            )),
+        ]
+
+    def create_titles(self, count):
+        titles = Title.objects.bulk_create([
+            Title(name=f'Замер {i}', year=2000,
+                  category_id=self.title.category_id)
+            for i in range(count)
+        ])
+        if titles and titles[0].pk is None:
+            return (Title.objects.order_by('-pk')
+                    .values_list('pk', flat=True)[:count])
+        return [title.pk for title in titles]
+
+    def create_reviews(self, count):
+        titles = list(self.create_titles(count))
+        Review.objects.bulk_create([
+            Review(title_id=pk, author=self.admin, text='Замер', score=5)
+            for pk in titles
+        ])
+        Title.objects.filter(pk__in=titles).recompute_ratings()
+        return Review.objects.order_by('-pk')[:count]
+
+    def create_comments(self, count):
+        Comment.objects.bulk_create([
+            Comment(review=self.review, author=self.admin, text='Замер')
+            for _ in range(count)
+        ])
+        return (Comment.objects.order_by('-pk')
+                .values_list('pk', flat=True)[:count])
+
+    def measure(self, route, token):
+        if self.base_url:
+            send = self.http_sender(route.method, token)
+        else:
+            client = APIClient()
+            if token is not None:
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            method = getattr(client, route.method)
+
+            def send(path, data):
+                with CaptureQueriesContext(connection) as queries:
+                    response = method(path, data, format='json')
+                return response.status_code, len(queries)
+
+        def timed(request):
+            path, data = request
+            started = time.perf_counter()
+            status, count = send(path, data)
+            return (time.perf_counter() - started) * 1000, status, count
+
+        warmup = self.options['warmup']
+        for path, data in route.requests[:warmup]:
+            send(path, data)
+        concurrency = self.options['concurrency']
+        started = time.perf_counter()
+        if concurrency == 1:
+            # Тестовый клиент работает в транзакции этого потока.
+            samples = [timed(request) for request in route.requests[warmup:]]
+        else:
+            with ThreadPoolExecutor(concurrency) as pool:
+                samples = list(pool.map(timed, route.requests[warmup:]))
+        elapsed = time.perf_counter() - started
+        timings = [timing for timing, _, _ in samples]
+        statuses = Counter(str(status) for _, status, _ in samples)
+        queries = [count for _, _, count in samples if count is not None]
+        return {
+            'method': route.method.upper(),
+            'path': route.requests[0][0],
+            'requests': len(timings),
+            'statuses': dict(statuses),
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries_avg': (round(statistics.mean(queries), 2)
+                            if queries else None),
+            'queries_max': max(queries) if queries else None,
+            'throughput_rps': round(len(timings) / elapsed, 1),
+        }
+
+    def http_sender(self, method, token):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+
+        def send(path, data):
+            request = Request(self.base_url + path, headers=headers,
+                              method=method.upper())
+            try:
+                with urlopen(request) as response:
+                    response.read()
+                    return response.status, None
+            except HTTPError as error:
+                return error.code, None
+
+        return send
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{'маршрут':<20} {'p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'запросов':>9} {'зап/с':>8}"
+        )
+        for name, result in report['routes'].items():
+            queries = result['queries_avg']
+            self.stdout.write(
+                f"{name:<20} {result['p50_ms']:>8.2f} "
+                f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                f"{'-' if queries is None else queries:>9} "
+                f"{result['throughput_rps']:>8.1f}"
+            )
+        self.stdout.write(
+            f"Всего {report['total']['requests']} запросов за "
+            f"{report['total']['seconds']} с "
+            f"({report['total']['throughput_rps']} зап/с)"
+        )
+
+    def compare(self, baseline, report):
+        """Печатает изменения p95 и числа запросов, возвращает регрессии."""
+        regressions = []
+        threshold = self.options['threshold']
+        for name, result in report['routes'].items():
+            before = baseline['routes'].get(name)
+            if before is None:
+                continue
+            change = (result['p95_ms'] - before['p95_ms']) / max(
+                before['p95_ms'], 1e-6
+            )
+            slower = change > threshold
+            more_queries = (
+                result['queries_max'] is not None
+                and before['queries_max'] is not None
+                and result['queries_max'] > before['queries_max']
+            )
+            if slower or more_queries:
+                regressions.append(name)
+            self.stdout.write(
+                f"{name:<20} p95 {before['p95_ms']:.2f} -> "
+                f"{result['p95_ms']:.2f} мс ({change:+.0%}), "
+                f"{before['throughput_rps']} -> {result['throughput_rps']} "
+                f"зап/с, запросов "
+                f"{before['queries_max']} -> {result['queries_max']}"
+                f"{'  РЕГРЕССИЯ' if slower or more_queries else ''}"
+            )
+        return regressions
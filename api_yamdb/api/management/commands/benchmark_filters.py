@@ -0,0 +1,150 @@
+import statistics
+import time
+
+from api.filters import TitleFilter
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from reviews.models import Category, Comment, Genre, Review, Title
+
+# Индексы из миграции reviews.0003_filter_indexes.
+FILTER_INDEXES = (
+    'title_name_idx', 'title_year_idx', 'genre_name_idx',
+    'category_name_idx', 'review_title_id_idx', 'comment_review_id_idx',
+    'title_name_trgm', 'category_slug_trgm', 'genre_slug_trgm',
+)
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[round(share * (len(values) - 1))]
+
+
+class Command(BaseCommand):
+    help = ("Показать планы EXPLAIN и время запросов фильтров произведений "
+            "и вложенных маршрутов с индексами и без них. "
+            "Индексы удаляются внутри транзакции и возвращаются откатом, "
+            "запускайте на отдельной базе.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--titles', type=int, default=0,
+            help='Предварительно создать N произведений командой seed_data.'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--page-size', type=int,
+            default=settings.REST_FRAMEWORK['PAGE_SIZE']
+        )
+
+    def handle(self, *args, **options):
+        if options['titles']:
+            call_command('seed_data', titles=options['titles'],
+                         stdout=self.stdout)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.repeat = options['repeat']
+        self.page_size = options['page_size']
+        queries = self.get_queries()
+        after = self.measure(queries, 'after')
+        with transaction.atomic():
+            dropped = self.drop_indexes()
+            before = self.measure(queries, 'before')
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f"Временно удалены индексы: {', '.join(dropped) or 'нет'}"
+        )
+        for label in queries:
+            self.report(label, before[label], after[label])
+
+    def get_queries(self):
+        title = Title.objects.order_by('pk').last()
+        review = Review.objects.order_by('pk').last()
+        if title is None or review is None:
+            raise CommandError(
+                'Нет данных: запустите команду с --titles или seed_data.'
+            )
+        word = title.name.split()[0]
+        category = Category.objects.order_by('pk').last().slug
+        genre = Genre.objects.order_by('pk').last().slug
+
+        def titles(**params):
+            return TitleFilter(params, queryset=Title.objects.all()).qs
+
+        return {
+            f'titles ?name={word}': titles(name=word),
+            f'titles ?category={category}': titles(category=category),
+            f'titles ?genre={genre}': titles(genre=genre),
+            f'titles ?year={title.year}': titles(year=title.year),
+            'titles ORDER BY name': Title.objects.all(),
+            'genres ORDER BY name': Genre.objects.all(),
+            'categories ORDER BY name': Category.objects.all(),
+            f'reviews title_id={title.pk}': Review.objects.filter(
+                title_id=title.pk
+            ),
+            f'review pk={review.pk}, title_id={review.title_id}': (
+                Review.objects.filter(pk=review.pk, title_id=review.title_id)
+            ),
+            f'comments review_id={review.pk}': Comment.objects.filter(
+                review_id=review.pk
+            ),
+        }
+
+    def drop_indexes(self):
+        dropped = []
+        with connection.cursor() as cursor:
+            for model in (Title, Genre, Category, Review, Comment):
+                constraints = connection.introspection.get_constraints(
+                    cursor, model._meta.db_table
+                )
+                for name in FILTER_INDEXES:
+                    if name in constraints:
+                        cursor.execute(
+                            f'DROP INDEX {connection.ops.quote_name(name)}'
+                        )
+                        dropped.append(name)
+        return dropped
+
+    def explain(self, queryset, phase):
+        # Метка фазы в тексте запроса нужна, чтобы драйвер не вернул план
+        # из кэша подготовленных выражений, собранный до удаления индексов.
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{connection.ops.explain_query_prefix()} '
+                f'/* {phase} */ {sql}',
+                params
+            )
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+
+    def measure(self, queries, phase):
+        results = {}
+        for label, queryset in queries.items():
+            page = queryset[:self.page_size]
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                list(page.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = {
+                'plan': self.explain(page, phase),
+                'median': statistics.median(timings),
+                'p95': percentile(timings, 0.95),
+            }
+        return results
+
+    def report(self, label, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        for title, result in (('без индексов', before),
+                              ('с индексами', after)):
+            self.stdout.write(
+                f"  {title}: медиана {result['median']:.2f} мс, "
+                f"p95 {result['p95']:.2f} мс"
+            )
+            for line in result['plan'].splitlines():
+                self.stdout.write(f"    {line}")
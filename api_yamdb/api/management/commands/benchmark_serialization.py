@@ -0,0 +1,89 @@
+import json
+import statistics
+import time
+
+from api.management.commands.benchmark_filters import percentile
+from api.renderers import FastJSONRenderer
+from api.serializers import ReviewSerializer, TitleSerializer
+from api.values import ValuesPlan
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = ("Сравнить сериализацию страницы произведений и отзывов: "
+            "ModelSerializer и JSONRenderer против строк .values() и "
+            "FastJSONRenderer. Данные с --titles создаются и откатываются.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--titles', type=int, default=0,
+            help='Создать N произведений командой seed_data на время замера.'
+        )
+        parser.add_argument('--reviews-per-title', type=int, default=100)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.options = options
+        with transaction.atomic():
+            if options['titles']:
+                call_command(
+                    'seed_data', titles=options['titles'],
+                    reviews_per_title=options['reviews_per_title'],
+                    comments_per_review=0, stdout=self.stdout,
+                )
+            title = Title.objects.order_by('-rating_count').first()
+            if title is None:
+                raise CommandError(
+                    'Нет данных: запустите команду с --titles или seed_data.'
+                )
+            self.compare('titles', TitleSerializer,
+                         Title.objects.with_related())
+            self.compare(
+                f'reviews title_id={title.pk}', ReviewSerializer,
+                Review.objects.filter(title=title).select_related('author')
+            )
+            transaction.set_rollback(True)
+
+    def model_path(self, serializer_class, queryset):
+        data = serializer_class(queryset.all(), many=True).data
+        return JSONRenderer().render(data)
+
+    def values_path(self, serializer_class, queryset):
+        plan = ValuesPlan(serializer_class(), queryset.model)
+        return FastJSONRenderer().render(
+            plan.serialize(plan.values(queryset.all()))
+        )
+
+    def measure(self, path, *args):
+        timings = []
+        for _ in range(self.options['repeat']):
+            started = time.perf_counter()
+            body = path(*args)
+            timings.append((time.perf_counter() - started) * 1000)
+        return body, timings
+
+    def compare(self, label, serializer_class, queryset):
+        page = queryset[:self.options['page_size']]
+        results = {
+            name: self.measure(path, serializer_class, page)
+            for name, path in (('ModelSerializer', self.model_path),
+                               ('values', self.values_path))
+        }
+        (model_body, before), (values_body, after) = results.values()
+        if json.loads(model_body) != json.loads(values_body):
+            raise CommandError(f'{label}: ответы двух путей различаются.')
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{label}: {len(page)} объектов, {len(model_body)} байт'
+        ))
+        for name, (_, timings) in results.items():
+            self.stdout.write(
+                f"  {name}: медиана {statistics.median(timings):.2f} мс, "
+                f"p95 {percentile(timings, 0.95):.2f} мс"
+            )
+        speedup = statistics.median(before) / statistics.median(after)
+        self.stdout.write(f"  ускорение: x{speedup:.1f}")
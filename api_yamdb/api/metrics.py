@@ -0,0 +1,205 @@
+import bisect
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from dbpool.pool import pools
+from django.db import connections
+from django.http import HttpResponse
+from reviews.outbox import queue_depth
+
+from .cache import get_stats
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+# Замеры текущего запроса; None - запрос не попал в выборку.
+current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL-запросы и время по этапам."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.view = 0.0
+        self.depth = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+@contextmanager
+def track_queries():
+    """Считает SQL-запросы текущего замера на соединениях этого потока."""
+    metrics = current.get()
+    with ExitStack() as stack:
+        if metrics is not None:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.execute_wrapper)
+                )
+        yield
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus: накопление по корзинам."""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        counts, total = self.series.get(
+            labels, ([0] * (len(self.buckets) + 1), 0)
+        )
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.series[labels] = (counts, total + value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        for (view, method), (counts, total) in sorted(self.series.items()):
+            labels = f'view="{view}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{labels},le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Гистограммы процесса. Каждый воркер gunicorn отдаёт свои."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.histograms = {
+            'duration': Histogram(
+                'yamdb_request_duration_seconds',
+                'Время обработки запроса.', SECONDS_BUCKETS),
+            'view': Histogram(
+                'yamdb_view_duration_seconds',
+                'Время работы view вместе с рендерингом.', SECONDS_BUCKETS),
+            'db': Histogram(
+                'yamdb_db_duration_seconds',
+                'Суммарное время SQL-запросов.', SECONDS_BUCKETS),
+            'serializer': Histogram(
+                'yamdb_serializer_duration_seconds',
+                'Время сериализации и валидации.', SECONDS_BUCKETS),
+            'queries': Histogram(
+                'yamdb_db_queries',
+                'Количество SQL-запросов.', QUERIES_BUCKETS),
+        }
+
+    def observe(self, labels, values):
+        with self.lock:
+            for name, value in values.items():
+                self.histograms[name].observe(labels, value)
+
+    def render(self):
+        with self.lock:
+            lines = []
+            for histogram in self.histograms.values():
+                lines.extend(histogram.render())
+        return lines
+
+
+registry = Registry()
+
+
+class TimedSerializerMixin:
+    """Относит время to_representation и валидации к сериализации.
+
+    Вложенные сериализаторы учитываются только внешним вызовом.
+    """
+
+    def timed(self, method, *args):
+        metrics = current.get()
+        if metrics is None or metrics.depth:
+            return method(*args)
+        metrics.depth += 1
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            metrics.serializer += time.perf_counter() - started
+            metrics.depth -= 1
+
+    def to_representation(self, instance):
+        return self.timed(super().to_representation, instance)
+
+    def run_validation(self, *args):
+        return self.timed(super().run_validation, *args)
+
+
+# Счётчики пула соединений: метрика, тип и описание.
+POOL_METRICS = (
+    ('opened', 'counter', 'Открыто физических соединений с БД.'),
+    ('reused', 'counter', 'Соединений выдано повторно из пула.'),
+    ('persistent', 'counter',
+     'Запросов, начатых с сохранённым соединением (CONN_MAX_AGE).'),
+    ('closed', 'counter', 'Закрыто физических соединений.'),
+    ('health_check_failures', 'counter', 'Соединений, не прошедших проверку.'),
+    ('waits', 'counter', 'Ожиданий свободного соединения в пуле.'),
+    ('timeouts', 'counter', 'Ожиданий, завершившихся ошибкой.'),
+    ('wait_seconds', 'counter', 'Суммарное время ожидания соединения.'),
+)
+
+
+def pool_lines():
+    snapshots = {alias: pool.snapshot() for alias, pool in pools.items()}
+    lines = [
+        '# HELP yamdb_db_pool_connections Соединения пула по состоянию.',
+        '# TYPE yamdb_db_pool_connections gauge',
+    ]
+    for alias, snapshot in snapshots.items():
+        for state in ('idle', 'in_use'):
+            lines.append(
+                f'yamdb_db_pool_connections{{alias="{alias}",'
+                f'state="{state}"}} {snapshot[state]}'
+            )
+    for key, kind, documentation in POOL_METRICS:
+        name = f'yamdb_db_connections_{key}_total'
+        lines.extend([f'# HELP {name} {documentation}',
+                      f'# TYPE {name} {kind}'])
+        for alias, snapshot in snapshots.items():
+            lines.append(f'{name}{{alias="{alias}"}} {snapshot[key]}')
+    return lines
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus."""
+    lines = registry.render()
+    stats = get_stats()
+    lines.extend([
+        '# HELP yamdb_cache_requests_total Обращения к кэшу ответов.',
+        '# TYPE yamdb_cache_requests_total counter',
+        f'yamdb_cache_requests_total{{result="hit"}} {stats["hits"]}',
+        f'yamdb_cache_requests_total{{result="miss"}} {stats["misses"]}',
+        '# HELP yamdb_email_queue_depth Письма, ожидающие отправки.',
+        '# TYPE yamdb_email_queue_depth gauge',
+        f'yamdb_email_queue_depth {queue_depth()}',
+        *pool_lines(),
+    ])
+    return HttpResponse(
+        '\n'.join(lines) + '\n',
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import compress, compress_stream, negotiate
+from .metrics import RequestMetrics, current, registry, track_queries
+
+logger = logging.getLogger('api.metrics')
+
+
+class MetricsMiddleware:
+    """
+    Для доли запросов METRICS_SAMPLE_RATE считает SQL-запросы, время БД,
+    сериализации и view. Результат попадает в гистограммы Prometheus,
+    в лог `api.metrics` и, при METRICS_HEADER, в заголовок Server-Timing.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как в MiddlewareMixin: под ASGI цепочка остаётся асинхронной.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with track_queries():
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        duration = time.perf_counter() - started
+        self.report(request, response, metrics, duration)
+        return response
+
+    async def __acall__(self, request):
+        """
+        Асинхронный вариант: SQL-запросы считаются в потоках,
+        где выполняется view (см. api.asyncviews).
+        """
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        duration = time.perf_counter() - started
+        self.report(request, response, metrics, duration)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current.get()
+        if metrics is not None:
+            request.metrics_view_started = time.perf_counter()
+
+    def report(self, request, response, metrics, duration):
+        started = getattr(request, 'metrics_view_started', None)
+        if started is not None:
+            metrics.view = time.perf_counter() - started
+        match = request.resolver_match
+        labels = (match.view_name if match else 'unmatched', request.method)
+        registry.observe(labels, {
+            'duration': duration,
+            'view': metrics.view,
+            'db': metrics.db,
+            'serializer': metrics.serializer,
+            'queries': metrics.queries,
+        })
+        if settings.METRICS_HEADER:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={metrics.db * 1000:.2f};'
+                f'desc="{metrics.queries} queries"',
+                f'serializer;dur={metrics.serializer * 1000:.2f}',
+                f'view;dur={metrics.view * 1000:.2f}',
+                f'total;dur={duration * 1000:.2f}',
+            ))
+        if settings.METRICS_LOG:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': labels[0],
+                'status': response.status_code,
+                'queries': metrics.queries,
+                'db_ms': round(metrics.db * 1000, 2),
+                'serializer_ms': round(metrics.serializer * 1000, 2),
+                'view_ms': round(metrics.view * 1000, 2),
+                'total_ms': round(duration * 1000, 2),
+            }))
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжатие gzip или brotli по Accept-Encoding для ответов типов
+    COMPRESSION_TYPES. Обычные ответы короче COMPRESSION_MIN_SIZE байт
+    отдаются как есть, потоковые сжимаются по частям: каждая часть
+    сразу уходит клиенту.
+    """
+
+    def compressible(self, response):
+        if (not settings.COMPRESSION_ENABLED
+                or response.has_header('Content-Encoding')):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type.strip() not in settings.COMPRESSION_TYPES:
+            return False
+        return (response.streaming
+                or len(response.content) >= settings.COMPRESSION_MIN_SIZE)
+
+    def process_response(self, request, response):
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                encoding, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            content = compress(encoding, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Сжатое тело отличается побайтно, как в GZipMiddleware.
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+        return response
@@ -1,6 +1,15 @@
-from rest_framework import filters, mixins, viewsets
+import hashlib
 
+from django.db.models import Prefetch
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import filters, mixins, serializers, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .cache import CacheGroupsMixin, get_versions
 from .permissions import IsAdminSuperuserOrReadOnly
+from .values import ValuesPlan
 
 
 class CreateDestroyListViewSet(
@@ -17,3 +26,179 @@ class CreateDestroyListViewSet(
     permission_classes = (IsAdminSuperuserOrReadOnly,)
 
     pass
+
+
+class ConditionalGetMixin(CacheGroupsMixin):
+    """
+    ETag и Last-Modified для list и retrieve.
+    На совпавший If-None-Match или If-Modified-Since отвечает 304,
+    не выполняя запрос страницы и сериализаторы.
+    """
+
+    send_last_modified = False
+
+    def get_validators(self):
+        """
+        Валидаторы считаются только по версиям групп кэша, без запросов
+        к БД: версии сдвигают сигналы моделей при любой записи.
+        """
+        groups = [self.get_cache_group()]
+        if self.detail:
+            groups += self.get_cache_groups()
+        versions = get_versions(groups)
+        etag = hashlib.md5(repr((
+            self.request.build_absolute_uri(), versions,
+        )).encode()).hexdigest()
+        last_modified = None
+        if self.send_last_modified:
+            last_modified = int(max(versions) / 1000)
+        return f'"{etag}"', last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+def related_columns(field):
+    """Колонки связанной модели, которые читает поле сериализатора."""
+    if isinstance(field, serializers.ManyRelatedField):
+        return related_columns(field.child_relation)
+    if isinstance(field, serializers.ListSerializer):
+        return related_columns(field.child)
+    if isinstance(field, serializers.SlugRelatedField):
+        return [field.slug_field]
+    if isinstance(field, serializers.BaseSerializer):
+        return [child.source for child in field.fields.values()]
+    return ['pk']
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields=id,name и ?expand=genre для list и retrieve. Сериализатор
+    sparse_serializer_class (с SparseFieldsMixin) отдаёт только эти поля,
+    а запрос читает только их колонки: ненужные JOIN и prefetch
+    отбрасываются, связанные модели читаются через only().
+    """
+
+    sparse_serializer_class = None
+    sparse_actions = ('list', 'retrieve')
+
+    def get_sparse_serializer_class(self):
+        return self.sparse_serializer_class or self.get_serializer_class()
+
+    def split_param(self, name, allowed):
+        value = self.request.query_params.get(name, '')
+        names = [item for item in value.split(',') if item]
+        unknown = [item for item in names if item not in allowed]
+        if unknown:
+            raise ValidationError(
+                {name: [f'Неизвестные поля: {", ".join(unknown)}.']}
+            )
+        return names
+
+    def get_sparse(self):
+        """(поля или None, раскрываемые связи) либо None без параметров."""
+        if self.action not in self.sparse_actions:
+            return None
+        if not hasattr(self, '_sparse'):
+            serializer_class = self.get_sparse_serializer_class()
+            names = self.split_param(
+                'fields', serializer_class(context={}).fields
+            )
+            expand = self.split_param(
+                'expand', serializer_class.expanded_fields
+            )
+            self._sparse = None
+            if names or expand:
+                self._sparse = (names or None, expand)
+        return self._sparse
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        sparse = self.get_sparse()
+        if sparse is not None:
+            context['sparse'] = sparse
+        return context
+
+    def prune_queryset(self, queryset, sparse):
+        """Оставляет в запросе колонки и связи выбранных полей."""
+        serializer = self.get_sparse_serializer_class()(
+            context={'sparse': sparse}
+        )
+        opts = queryset.model._meta
+        columns, related, prefetches = [opts.pk.name], [], []
+        for name, field in serializer.fields.items():
+            source = serializer.field_columns.get(name, field.source)
+            if source == '*':
+                continue
+            model_field = opts.get_field(source)
+            if model_field.many_to_many:
+                prefetches.append(Prefetch(
+                    source,
+                    model_field.related_model.objects.only(
+                        'pk', *related_columns(field)
+                    ),
+                ))
+            elif model_field.is_relation:
+                related.append(source)
+                columns += [f'{source}__{column}'
+                            for column in related_columns(field)]
+            else:
+                columns.append(source)
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.prefetch_related(*prefetches).only(*columns)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        sparse = self.get_sparse()
+        if sparse is None:
+            return queryset
+        return self.prune_queryset(queryset, sparse)
+
+
+class ValuesListMixin:
+    """
+    list собирает словари из строк .values() по ValuesPlan, минуя
+    экземпляры моделей и to_representation полей. Ответ тот же, что
+    у сериализатора, с учётом ?fields= и ?expand=. Подключается
+    к вьюсету примесью, values_list = False возвращает обычный путь.
+    """
+
+    values_list = True
+
+    def get_values_serializer(self):
+        serializer_class = (getattr(self, 'sparse_serializer_class', None)
+                            or self.get_serializer_class())
+        return serializer_class(context=self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        if not self.values_list:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = ValuesPlan(self.get_values_serializer(), queryset.model)
+        rows = plan.values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(rows))
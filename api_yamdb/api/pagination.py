@@ -0,0 +1,44 @@
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация по id: без COUNT(*) и OFFSET,
+    поэтому время выдачи страницы не зависит от её номера.
+    """
+
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class OptInCursorPagination(BasePagination):
+    """
+    Постраничная пагинация по умолчанию,
+    курсорная - по запросу клиента с параметром ?pagination=cursor.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    page_number_class = PageNumberPagination
+    cursor_class = IdCursorPagination
+
+    def get_paginator(self, request):
+        if request.query_params.get(self.mode_query_param) == self.cursor_mode:
+            return self.cursor_class()
+        return self.page_number_class()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+    def to_html(self):
+        return self.paginator.to_html()
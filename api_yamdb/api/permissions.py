@@ -5,12 +5,13 @@ class IsAuthorAdminModeratorOrReadOnly(permissions.BasePermission):
     """
     Доступ для автора, админа, модератора
     или любого пользователю только для чтения.
+    Автор сравнивается по author_id, без загрузки пользователя.
     """
 
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.pk
             or request.user.is_admin
             or request.user.is_moderator
         )
@@ -0,0 +1,55 @@
+from rest_framework import renderers
+from reviews import export
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """
+    JSON по объекту в строке. Выгрузка отдаётся потоком мимо рендерера,
+    сюда попадают только ответы с ошибками.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = export.NDJSON
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ''.join(export.ndjson_lines([data])).encode(self.charset)
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """csv с заголовком, для ответов с ошибками - одна строка."""
+
+    media_type = 'text/csv'
+    format = export.CSV
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ''.join(
+            export.csv_lines(list(data), [data])
+        ).encode(self.charset)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer на orjson. Без orjson и для ответов с отступами
+    (например, ?indent= в Accept) работает как обычный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {})):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        return orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
@@ -1,41 +1,98 @@
 from django.core.validators import RegexValidator
-from django.db.models import Avg
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, Review, SearchEntry,
+                            Title, TitleRanking, User)
+from reviews.validators import validate_slug, validate_year
 
+from .metrics import TimedSerializerMixin
 
-class CategorySerializer(serializers.ModelSerializer):
+DUPLICATE_REVIEW_MESSAGE = 'Вы уже опубликовали отзыв к этой публикации!'
+
+
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class AuthorSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Автор отзыва или комментария для ?expand=author."""
+
+    class Meta:
+        model = User
+        fields = ('username', 'first_name', 'last_name')
+
+
+class SparseFieldsMixin:
+    """
+    Поля из ?fields= и ?expand=: вьюсет с SparseFieldsetMixin кладёт
+    в контекст sparse = (поля или None для всех, раскрываемые связи).
+    Без sparse представление полное. Связь из expand отдаётся вложенным
+    объектом expanded_fields. Остальные связи при заданном ?fields=
+    отдаются плоско - полем из slim_fields, без ?fields= - как обычно.
+    """
+
+    slim_fields = {}
+    expanded_fields = {}
+    # Колонки модели для полей без своего source, например методов.
+    field_columns = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse = self.context.get('sparse')
+        if sparse is None:
+            return fields
+        names, expand = sparse
+        selected = {}
+        for name, field in fields.items():
+            if name in expand:
+                selected[name] = self.expanded_fields[name]()
+            elif names is None:
+                selected[name] = field
+            elif name in names:
+                slim = self.slim_fields.get(name)
+                selected[name] = slim() if slim else field
+        return selected
+
+
+class TitleSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                      serializers.ModelSerializer):
     """Сериализатор произведений."""
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.SerializerMethodField()
 
+    slim_fields = {
+        'category': lambda: serializers.SlugRelatedField(
+            slug_field='slug', read_only=True
+        ),
+        'genre': lambda: serializers.SlugRelatedField(
+            slug_field='slug', read_only=True, many=True
+        ),
+    }
+    expanded_fields = {
+        'category': lambda: CategorySerializer(read_only=True),
+        'genre': lambda: GenreSerializer(read_only=True, many=True),
+    }
+    field_columns = {'rating': 'rating'}
+
     class Meta:
         model = Title
         fields = ('id', 'name', 'year', 'rating',
                   'description', 'genre', 'category')
 
     def get_rating(self, obj):
-        rating = (obj.review.aggregate(Avg('score'))
-                  .get('score__avg', None)
-                  )
-        return round(rating) if rating is not None else None
+        return round(obj.rating) if obj.rating is not None else None
 
 
-class TitleCreateSerializer(serializers.ModelSerializer):
+class TitleCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор создания произведений."""
     category = serializers.SlugRelatedField(
         slug_field='slug',
@@ -57,44 +114,43 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         return TitleSerializer(instance, context=self.context).data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class SlugItemBulkSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Жанр или категория в пакетной записи, без запросов к БД."""
+    name = serializers.CharField(max_length=256)
+    slug = serializers.SlugField(max_length=50, validators=(validate_slug,))
+
+
+class TitleBulkSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Произведение в пакетной записи: slug-и проверяются всей пачкой."""
+    id = serializers.IntegerField(required=False, min_value=1)
+    name = serializers.CharField(max_length=100)
+    year = serializers.IntegerField(validators=(validate_year,))
+    description = serializers.CharField(
+        max_length=100, required=False, allow_blank=True, default=''
+    )
+    category = serializers.SlugField()
+    genre = serializers.ListField(
+        child=serializers.SlugField(), required=False, default=list
+    )
+
+
+class ReviewSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                       serializers.ModelSerializer):
     """Сериализатор Отзывов."""
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
 
+    expanded_fields = {'author': lambda: AuthorSerializer(read_only=True)}
+
     class Meta:
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
-        """Проверка на повторную публикацию отзыва"""
 
-        request = self.context.get('request')
-        if request is None and not hasattr(request, 'user'):
-            raise serializers.ValidationError(
-                'Возникла ошибка при обработке запроса: '
-                'не удалось извлечь автора отзыва.')
-        view = self.context.get('view')
-        if view is None:
-            raise serializers.ValidationError(
-                'Возникла ошибка при обработке запроса: '
-                'не удалось извлечь объект view.')
-        title_id = view.kwargs.get('title_id')
-        if title_id is None:
-            raise serializers.ValidationError(
-                'Возникла ошибка при обработке запроса: '
-                'не удалось извлечь title_id из запроса.')
-        review = Review.objects.filter(title__id=title_id,
-                                       author=request.user)
-        if review.exists() and request.method == 'POST':
-            raise serializers.ValidationError(
-                'Вы уже опубликовали отзыв к этой публикации!')
-        return data
-
-
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                        serializers.ModelSerializer):
     """Сериализатор комментариев."""
 
     author = serializers.SlugRelatedField(
@@ -102,12 +158,14 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
+    expanded_fields = {'author': lambda: AuthorSerializer(read_only=True)}
+
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date')
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для работы с пользователями."""
     username = serializers.CharField(
         validators=(
@@ -132,7 +190,7 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class RegistrUserSerializer(serializers.ModelSerializer):
+class RegistrUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для регистрации пользователей."""
     username = serializers.CharField(
         validators=(
@@ -161,13 +219,13 @@ class RegistrUserSerializer(serializers.ModelSerializer):
         return value
 
 
-class TokenUserSerializer(serializers.Serializer):
+class TokenUserSerializer(TimedSerializerMixin, serializers.Serializer):
     """Сериализатор для работы с токеном."""
     username = serializers.CharField(required=True)
     confirmation_code = serializers.CharField(required=True)
 
 
-class ProfileUserSerializer(serializers.ModelSerializer):
+class ProfileUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для работы с личными данными поьзователя."""
     username = serializers.CharField(
         validators=(
@@ -191,3 +249,45 @@ class ProfileUserSerializer(serializers.ModelSerializer):
             'last_name', 'bio', 'role'
         )
         read_only_fields = ('role',)
+
+
+class SearchResultSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
+    """Сериализатор результатов поиска."""
+    type = serializers.CharField(source='kind')
+    id = serializers.IntegerField(source='object_id')
+    title_id = serializers.SerializerMethodField()
+    text = serializers.CharField(source='body')
+    rank = serializers.FloatField()
+
+    class Meta:
+        model = SearchEntry
+        fields = ('type', 'id', 'title_id', 'review_id', 'heading', 'text',
+                  'rank')
+
+    def get_title_id(self, obj):
+        if obj.title_id is not None:
+            return obj.title_id
+        return obj.review.title_id
+
+
+class TitleStatsSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Статистика оценок произведения."""
+    title = serializers.IntegerField()
+    count = serializers.IntegerField()
+    mean = serializers.FloatField(allow_null=True)
+    median = serializers.FloatField(allow_null=True)
+    histogram = serializers.DictField(child=serializers.IntegerField())
+
+
+class TitleRankingSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
+    """Место произведения в рейтинге."""
+    id = serializers.IntegerField(source='title_id')
+    name = serializers.CharField(source='title.name')
+    year = serializers.IntegerField(source='title.year')
+
+    class Meta:
+        model = TitleRanking
+        fields = ('position', 'id', 'name', 'year', 'rating',
+                  'rating_count', 'weighted_rating')
@@ -0,0 +1,94 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+from .cache import invalidate
+
+AUTHOR_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+def title_groups(title_ids):
+    """Группы списка, рейтинга и отдельных произведений."""
+    title_ids = list(title_ids)
+    if not title_ids:
+        return []
+    return ['titles', 'ranking',
+            *(f'titles:{title_id}' for title_id in title_ids)]
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate(*title_groups([instance.pk]), f'reviews:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate(*title_groups([instance.pk]))
+    elif pk_set:
+        invalidate(f'genres:{instance.slug}', *title_groups(pk_set))
+
+
+def invalidate_slug(group, instance, title_ids):
+    invalidate(group, f'{group}:{instance.slug}', *title_groups(title_ids))
+
+
+@receiver(post_save, sender=Genre)
+def invalidate_genre(sender, instance, created, **kwargs):
+    title_ids = [] if created else instance.titles.values_list(
+        'pk', flat=True
+    )
+    invalidate_slug('genres', instance, title_ids)
+
+
+@receiver(pre_delete, sender=Genre)
+def invalidate_deleted_genre(sender, instance, **kwargs):
+    # Связи с произведениями удаляются раньше post_delete.
+    invalidate_slug(
+        'genres', instance, instance.titles.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, created=True, **kwargs):
+    title_ids = [] if created else instance.titles.values_list(
+        'pk', flat=True
+    )
+    invalidate_slug('categories', instance, title_ids)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    group = f'reviews:{instance.title_id}'
+    invalidate(group, f'{group}:{instance.pk}', f'comments:{instance.pk}',
+               'titles', f'titles:{instance.title_id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    group = f'comments:{instance.review_id}'
+    invalidate(group, f'{group}:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, created, update_fields, **kwargs):
+    # Имя автора входит в представление его отзывов и комментариев.
+    if created or (
+        update_fields is not None and not AUTHOR_FIELDS & set(update_fields)
+    ):
+        return
+    groups = []
+    for title_id, pk in instance.reviews.values_list('title_id', 'pk'):
+        groups += [f'reviews:{title_id}', f'reviews:{title_id}:{pk}']
+    for review_id, pk in instance.comments.values_list('review_id', 'pk'):
+        groups += [f'comments:{review_id}', f'comments:{review_id}:{pk}']
+    if groups:
+        invalidate(*groups)
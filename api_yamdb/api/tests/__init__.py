@@ -0,0 +1,24 @@
+from django.test import TestCase
+from reviews.models import Category, Title
+
+
+def create_title(**fields):
+    """Произведение «Титаник» (1997) в категории «Фильмы»."""
+    category = Category.objects.create(name='Фильмы', slug='films')
+    return Title.objects.create(
+        name='Титаник', year=1997, category=category, **fields
+    )
+
+
+class TitleTestCase(TestCase):
+    """
+    Общие данные тестов API: cls.title из create_title и его
+    cls.category. Поля произведения дополняет title_fields.
+    """
+
+    title_fields = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = create_title(**cls.title_fields)
+        cls.category = cls.title.category
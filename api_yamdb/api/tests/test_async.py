@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+from api.asyncviews import async_read, async_read_routes, read_pool
+from api.tests import create_title
+from api.urls import router_v1
+from django.core.cache import cache
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import include, path
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
+def thread_name(request):
+    return Response({'thread': threading.current_thread().name})
+
+
+urlpatterns = [
+    path('api/v1/', include(async_read_routes(
+        router_v1.urls, ('titles', 'reviews', 'comments')
+    ))),
+    path('thread/', async_read(thread_name)),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, ASYNC_READ_THREADS=2)
+class AsyncReadTests(TransactionTestCase):
+    """Чтение через ASGI в ограниченном пуле потоков."""
+
+    def setUp(self):
+        cache.clear()
+        read_pool.shutdown()
+        self.addCleanup(read_pool.shutdown)
+        self.title = create_title()
+
+    def test_only_selected_routes_wrapped(self):
+        routes = {pattern.name: pattern.callback
+                  for pattern in urlpatterns[0].url_patterns}
+        for name in ('titles-list', 'reviews-detail', 'comments-list'):
+            self.assertTrue(asyncio.iscoroutinefunction(routes[name]))
+        self.assertFalse(asyncio.iscoroutinefunction(routes['user-list']))
+
+    async def test_reads_run_in_pool_writes_do_not(self):
+        client = AsyncClient()
+        response = await client.get('/thread/')
+        self.assertTrue(response.data['thread'].startswith('yamdb-read'))
+        response = await client.post('/thread/')
+        self.assertFalse(response.data['thread'].startswith('yamdb-read'))
+
+    async def test_titles_list_and_detail(self):
+        client = AsyncClient()
+        response = await client.get('/api/v1/titles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['name'], 'Титаник')
+        response = await client.get(f'/api/v1/titles/{self.title.pk}/')
+        self.assertEqual(response.json()['year'], 1997)
+        response = await client.get(
+            f'/api/v1/titles/{self.title.pk + 1}/reviews/'
+        )
+        self.assertEqual(response.status_code, 404)
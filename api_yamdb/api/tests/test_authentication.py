@@ -0,0 +1,165 @@
+from api.authentication import ClaimsAccessToken
+from api.tests import TitleTestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class ClaimsAuthenticationTests(TitleTestCase):
+    """Пользователь из claims токена и версия токена из кэша."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.ru'
+        )
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role=User.ADMIN
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def user_queries(self, client, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, data)
+        return response, [query['sql'] for query in queries
+                          if 'reviews_user' in query['sql']]
+
+    def test_token_contains_claims(self):
+        token = ClaimsAccessToken.for_user(self.admin)
+        self.assertEqual(token['username'], 'admin')
+        self.assertEqual(token['role'], User.ADMIN)
+        self.assertEqual(token['ver'], 0)
+
+    def test_read_checks_only_version(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.author))
+        response, queries = self.user_queries(
+            client, 'get', '/api/v1/titles/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('token_version', queries[0])
+        self.assertNotIn('email', queries[0])
+
+    def test_warm_cache_does_not_touch_users(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.author))
+        self.user_queries(client, 'get', '/api/v1/titles/')
+        response, queries = self.user_queries(
+            client, 'get', '/api/v1/titles/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_deactivation_clears_cached_version(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.author))
+        self.assertEqual(client.get('/api/v1/titles/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.is_active = False
+            self.author.save()
+        response = client.get('/api/v1/titles/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_write_uses_claims_user(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.author))
+        response = client.post(
+            f'/api/v1/titles/{self.title.id}/reviews/',
+            {'text': 'Отлично', 'score': 9},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['author'], 'author')
+        self.assertEqual(
+            self.title.review.get().author_id, self.author.pk
+        )
+
+    def test_admin_role_from_claims(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.admin))
+        response, queries = self.user_queries(
+            client, 'post', '/api/v1/categories/',
+            {'name': 'Книги', 'slug': 'books'},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(queries), 1)
+
+    def test_role_change_revokes_claims(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.admin))
+        self.admin.role = User.USER
+        self.admin.save()
+        # Отзыв хранится в БД и не зависит от содержимого кэша.
+        cache.clear()
+        response = client.post(
+            '/api/v1/categories/', {'name': 'Книги', 'slug': 'books'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_role_change_with_update_fields_revokes_claims(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.admin))
+        self.admin.role = User.USER
+        self.admin.save(update_fields=['role'])
+        response = client.get('/api/v1/titles/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_new_token_after_role_change(self):
+        self.admin.role = User.USER
+        self.admin.save()
+        client = self.client_for(ClaimsAccessToken.for_user(self.admin))
+        response = client.post(
+            '/api/v1/categories/', {'name': 'Книги', 'slug': 'books'}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_profile_change_keeps_token(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.author))
+        self.author.bio = 'Читатель'
+        self.author.save()
+        response = client.get('/api/v1/titles/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleted_user_rejected(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.author))
+        self.author.delete()
+        response = client.get('/api/v1/titles/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_deleted_user_cannot_write(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.author))
+        self.author.delete()
+        response = client.post(
+            f'/api/v1/titles/{self.title.id}/reviews/',
+            {'text': 'Отлично', 'score': 9},
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_inactive_user_rejected(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.author))
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        response = client.get('/api/v1/titles/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_token_without_claims_reads_row(self):
+        client = self.client_for(AccessToken.for_user(self.author))
+        for _ in range(2):
+            response, queries = self.user_queries(
+                client, 'get', '/api/v1/titles/'
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(queries), 1)
+
+    def test_profile_reads_database_row(self):
+        client = self.client_for(ClaimsAccessToken.for_user(self.author))
+        response = client.patch('/api/v1/users/me/', {'bio': 'Читатель'})
+        self.assertEqual(response.status_code, 200)
+        response = client.get('/api/v1/users/me/')
+        self.assertEqual(response.data['email'], 'author@yamdb.ru')
+        self.assertEqual(response.data['bio'], 'Читатель')
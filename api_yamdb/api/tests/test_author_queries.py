@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Review, Title, User
+
+# Отдельный запрос за пользователем, а не JOIN со страницей.
+USER_QUERY = 'FROM "reviews_user" WHERE'
+
+
+class AuthorQueryTests(TestCase):
+    """Автор отзывов и комментариев не загружается по одному."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильмы', slug='films')
+        cls.small = Title.objects.create(name='Аватар', year=2009,
+                                         category=category)
+        cls.large = Title.objects.create(name='Титаник', year=1997,
+                                         category=category)
+        cls.users = [User.objects.create(username=f'user{number}',
+                                         email=f'user{number}@yamdb.ru')
+                     for number in range(5)]
+        for title, authors in ((cls.small, cls.users[:1]),
+                               (cls.large, cls.users)):
+            for author in authors:
+                review = Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=7
+                )
+                for commenter in authors:
+                    Comment.objects.create(review=review, author=commenter,
+                                           text='Комментарий')
+        cls.review = review
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+        self.assertLess(response.status_code, 300)
+        return [query['sql'] for query in queries]
+
+    def assert_no_user_lookups(self, queries):
+        self.assertFalse([sql for sql in queries if USER_QUERY in sql])
+
+    def test_lists_constant_per_page(self):
+        for path in ('reviews/', 'reviews/{review}/comments/'):
+            counts = []
+            for title in (self.small, self.large):
+                review = title.review.order_by('pk').last()
+                cache.clear()
+                queries = self.queries('get', (
+                    f'/api/v1/titles/{title.pk}/{path}'.format(
+                        review=review.pk
+                    )
+                ))
+                self.assert_no_user_lookups(queries)
+                counts.append(len(queries))
+            self.assertEqual(counts[0], counts[1], path)
+
+    def test_update_and_delete_by_author(self):
+        author = self.review.author
+        self.client.force_authenticate(author)
+        base = f'/api/v1/titles/{self.large.pk}/reviews/{self.review.pk}/'
+        queries = self.queries('patch', base, {'text': 'Изменён'})
+        self.assert_no_user_lookups(queries)
+        comment = self.review.comments.get(author=author)
+        queries = self.queries('patch', f'{base}comments/{comment.pk}/',
+                               {'text': 'Изменён'})
+        self.assert_no_user_lookups(queries)
+        queries = self.queries('delete', f'{base}comments/{comment.pk}/')
+        self.assert_no_user_lookups(queries)
+        queries = self.queries('delete', base)
+        self.assert_no_user_lookups(queries)
+
+    def test_other_user_still_forbidden(self):
+        self.client.force_authenticate(self.users[0])
+        response = self.client.patch(
+            f'/api/v1/titles/{self.large.pk}/reviews/{self.review.pk}/',
+            {'text': 'Чужой'}
+        )
+        self.assertEqual(response.status_code, 403)
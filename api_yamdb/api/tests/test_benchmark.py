@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from reviews.models import Comment, Review, Title, User
+
+
+class BenchmarkApiTests(TestCase):
+    """Команда benchmark_api на маленьком наборе данных."""
+
+    def setUp(self):
+        descriptor, self.output = tempfile.mkstemp(suffix='.json')
+        os.close(descriptor)
+        self.addCleanup(os.remove, self.output)
+
+    def benchmark(self, **options):
+        options = {'titles': 2, 'reviews_per_title': 2, **options}
+        call_command(
+            'benchmark_api', requests=2, warmup=0, output=self.output,
+            stdout=StringIO(), **options
+        )
+        with open(self.output, encoding='utf8') as report:
+            return json.load(report)
+
+    def test_report_and_rollback(self):
+        report = self.benchmark()
+        self.assertEqual(report['meta']['titles'], 2)
+        self.assertEqual(len(report['routes']), 34)
+        for name, result in report['routes'].items():
+            self.assertEqual(result['requests'], 2, name)
+            self.assertTrue(
+                all(status.startswith('2') for status in result['statuses']),
+                name
+            )
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertIsNotNone(result['queries_avg'])
+        self.assertFalse(Title.objects.exists())
+
+    def test_compare_finds_query_regression(self):
+        baseline = self.benchmark(only=['titles list'], no_cache=True)
+        baseline['routes']['titles list']['queries_max'] = 0
+        baseline_path = self.output + '.baseline'
+        with open(baseline_path, 'w', encoding='utf8') as output:
+            json.dump(baseline, output)
+        self.addCleanup(os.remove, baseline_path)
+        with self.assertRaisesMessage(CommandError, 'titles list'):
+            self.benchmark(
+                only=['titles list'], no_cache=True, compare=baseline_path,
+                fail_on_regression=True,
+            )
+
+    def test_base_url_reads_server_data_and_cleans_up(self):
+        call_command('seed_data', titles=1, reviews_per_title=1,
+                     comments_per_review=1, stdout=StringIO())
+        counts = [model.objects.count()
+                  for model in (Title, Review, Comment, User)]
+        response = mock.MagicMock(status=200)
+        response.__enter__.return_value = response
+        with mock.patch(
+            'api.management.commands.benchmark_api.urlopen',
+            return_value=response,
+        ) as urlopen:
+            report = self.benchmark(titles=0, base_url='http://bench.test')
+        methods = {request.get_method()
+                   for (request,), _ in urlopen.call_args_list}
+        self.assertEqual(methods, {'GET'})
+        self.assertTrue(all(result['method'] == 'GET'
+                            for result in report['routes'].values()))
+        self.assertEqual(counts, [model.objects.count()
+                                  for model in (Title, Review, Comment, User)])
+
+    def test_base_url_rejects_seeding(self):
+        with self.assertRaisesMessage(CommandError, '--titles'):
+            self.benchmark(base_url='http://bench.test')
+
+    def test_concurrency_requires_base_url(self):
+        with self.assertRaisesMessage(CommandError, '--base-url'):
+            self.benchmark(concurrency=4)
@@ -0,0 +1,194 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, SearchEntry, Title, User
+
+
+class BulkWriteTests(TestCase):
+    """Пакетная запись произведений, жанров и категорий."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Фильмы', slug='films')
+        Category.objects.create(name='Книги', slug='books')
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role=User.ADMIN
+        )
+        cls.user = User.objects.create(
+            username='user', email='user@yamdb.ru'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def titles(self, count, **fields):
+        return [
+            {'name': f'Фильм {number}', 'year': 2000 + number,
+             'category': 'films', 'genre': ['drama', 'comedy'], **fields}
+            for number in range(count)
+        ]
+
+    def post_titles(self, items):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/v1/titles/bulk/', items, format='json'
+            )
+        return response, len(queries)
+
+    def test_create_titles_constant_queries(self):
+        response, small = self.post_titles(self.titles(2))
+        self.assertEqual(response.status_code, 201)
+        response, large = self.post_titles(self.titles(20))
+        self.assertEqual(response.status_code, 201)
+        if connection.features.can_return_rows_from_bulk_insert:
+            # Без RETURNING (SQLite) произведения вставляются по одному.
+            self.assertEqual(small, large)
+        self.assertEqual(Title.objects.count(), 22)
+        title = Title.objects.get(pk=response.data[-1]['id'])
+        self.assertEqual(response.data[-1]['status'], 'created')
+        self.assertEqual(title.category, self.category)
+        self.assertEqual(
+            sorted(title.genre.values_list('slug', flat=True)),
+            ['comedy', 'drama']
+        )
+        self.assertTrue(SearchEntry.objects.filter(
+            kind=SearchEntry.TITLE, object_id=title.pk
+        ).exists())
+
+    def test_invalid_items_reported_nothing_written(self):
+        items = self.titles(4)
+        items[1]['category'] = 'missing'
+        items[2]['year'] = 3000
+        items[3]['genre'] = ['drama', 'unknown']
+        response, _ = self.post_titles(items)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('category', response.data[1])
+        self.assertIn('year', response.data[2])
+        self.assertIn('genre', response.data[3])
+        self.assertFalse(Title.objects.exists())
+
+    def test_id_only_allowed_for_put(self):
+        response, _ = self.post_titles(self.titles(1, id=1))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data[0])
+
+    def test_put_upserts_and_replaces_genres(self):
+        title = Title.objects.create(
+            name='Старое', year=1990, category=self.category
+        )
+        title.genre.set(Genre.objects.all())
+        items = [
+            {'id': title.pk, 'name': 'Новое', 'year': 1991,
+             'category': 'books', 'genre': ['drama']},
+            *self.titles(1),
+        ]
+        response = self.client.put(
+            '/api/v1/titles/bulk/', items, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['status'] for item in response.data],
+            ['updated', 'created']
+        )
+        title.refresh_from_db()
+        self.assertEqual((title.name, title.category.slug),
+                         ('Новое', 'books'))
+        self.assertEqual(list(title.genre.values_list('slug', flat=True)),
+                         ['drama'])
+        response = self.client.get(f'/api/v1/titles/{title.pk}/')
+        self.assertEqual(response.data['name'], 'Новое')
+
+    def test_put_unknown_or_repeated_id(self):
+        title = Title.objects.create(
+            name='Старое', year=1990, category=self.category
+        )
+        items = self.titles(3)
+        items[0]['id'] = title.pk
+        items[1]['id'] = title.pk
+        items[2]['id'] = title.pk + 100
+        response = self.client.put(
+            '/api/v1/titles/bulk/', items, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('id', response.data[1])
+        self.assertIn('id', response.data[2])
+
+    def test_slug_bulk_create_and_upsert(self):
+        items = [{'name': 'Ужасы', 'slug': 'horror'},
+                 {'name': 'Драма!', 'slug': 'drama'}]
+        response = self.client.post(
+            '/api/v1/genres/bulk/', items, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('slug', response.data[1])
+        response = self.client.put(
+            '/api/v1/genres/bulk/', items, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['status'] for item in response.data],
+            ['created', 'updated']
+        )
+        self.assertEqual(Genre.objects.get(slug='drama').name, 'Драма!')
+        response = self.client.post(
+            '/api/v1/categories/bulk/',
+            [{'name': 'Музыка', 'slug': 'music'},
+             {'name': 'Ещё', 'slug': 'music'}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('slug', response.data[1])
+
+    def test_ids_come_from_database(self):
+        deleted = Title.objects.create(name='Удалённый', year=2000,
+                                       category=self.category).pk
+        Title.objects.filter(pk=deleted).delete()
+        response, _ = self.post_titles(self.titles(3))
+        self.assertEqual(response.status_code, 201)
+        ids = [item['id'] for item in response.data]
+        self.assertEqual(len(set(ids)), 3)
+        self.assertGreater(min(ids), deleted)
+        self.assertEqual(
+            list(Title.objects.filter(pk__in=ids).order_by('pk')
+                 .values_list('name', flat=True)),
+            ['Фильм 0', 'Фильм 1', 'Фильм 2']
+        )
+
+    def test_bulk_slug_reserved(self):
+        response = self.client.post(
+            '/api/v1/genres/', {'name': 'Пачка', 'slug': 'bulk'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('slug', response.data)
+        response = self.client.put(
+            '/api/v1/categories/bulk/', [{'name': 'Пачка', 'slug': 'bulk'}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('slug', response.data[0])
+        self.assertFalse(Category.objects.filter(slug='bulk').exists())
+
+    def test_empty_or_not_list(self):
+        for data in ([], {'name': 'Фильм'}):
+            response = self.client.post(
+                '/api/v1/titles/bulk/', data, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(self.user)
+        response, _ = self.post_titles(self.titles(1))
+        self.assertEqual(response.status_code, 403)
+        self.client.force_authenticate(None)
+        response, _ = self.post_titles(self.titles(1))
+        self.assertEqual(response.status_code, 401)
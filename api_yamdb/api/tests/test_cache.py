@@ -0,0 +1,75 @@
+from api.tests import TitleTestCase
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from reviews.models import Genre, User
+
+
+class ResponseCacheTests(TitleTestCase):
+    """Кэш ответов каталога и его сброс при записи."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+        cls.title.genre.add(cls.genre)
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role=User.ADMIN
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin)
+
+    def test_hit_skips_database(self):
+        url = f'/api/v1/titles/{self.title.id}/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['name'], 'Титаник')
+        self.assertEqual(
+            self.admin_client.get('/api/v1/cache/stats/').data,
+            {'hits': 1, 'misses': 1}
+        )
+
+    def test_query_string_is_part_of_key(self):
+        self.client.get('/api/v1/titles/')
+        response = self.client.get('/api/v1/titles/?year=1997')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_title_update_invalidates_list_and_detail(self):
+        url = f'/api/v1/titles/{self.title.id}/'
+        self.client.get('/api/v1/titles/')
+        self.client.get(url)
+        self.client.get('/api/v1/genres/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.patch(url, {'name': 'Аватар'})
+
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'Аватар')
+        response = self.client.get('/api/v1/titles/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/v1/genres/')['X-Cache'], 'HIT')
+
+    def test_genre_delete_invalidates_its_titles(self):
+        url = f'/api/v1/titles/{self.title.id}/'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.delete(f'/api/v1/genres/{self.genre.slug}/')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['genre'], [])
+
+    def test_review_invalidates_title(self):
+        url = f'/api/v1/titles/{self.title.id}/'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.post(
+                f'{url}reviews/', {'text': 'Отлично', 'score': 9}
+            )
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['rating'], 9)
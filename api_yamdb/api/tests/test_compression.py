@@ -0,0 +1,115 @@
+import gzip
+
+import brotli
+from api.compression import accepted, negotiate
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title, User
+
+
+class NegotiationTests(TestCase):
+    """Выбор кодировки по Accept-Encoding."""
+
+    def test_weights_and_server_preference(self):
+        self.assertEqual(accepted('gzip;q=0.5, br'), {'gzip': 0.5, 'br': 1})
+        self.assertEqual(negotiate('gzip, deflate, br'), 'br')
+        self.assertEqual(negotiate('br;q=0.4, gzip'), 'gzip')
+        self.assertEqual(negotiate('br;q=0, *'), 'gzip')
+        self.assertIsNone(negotiate('identity'))
+        self.assertIsNone(negotiate(''))
+        with override_settings(COMPRESSION_ENCODINGS=['gzip']):
+            self.assertEqual(negotiate('br, gzip'), 'gzip')
+
+
+class CompressionTests(TestCase):
+    """Сжатие страниц произведений, отзывов и потоковой выгрузки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильмы', slug='films')
+        genres = [Genre.objects.create(name=f'Жанр {number}',
+                                       slug=f'genre-{number}')
+                  for number in range(3)]
+        for number in range(5):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000 + number,
+                category=category,
+                description='Описание произведения для каталога. ' * 2,
+            )
+            title.genre.set(genres)
+        cls.title = title
+        cls.admin = User.objects.create(username='admin', email='a@yamdb.ru',
+                                        role=User.ADMIN)
+        for number in range(50):
+            author = User.objects.create(username=f'user{number}',
+                                         email=f'user{number}@yamdb.ru')
+            Review.objects.create(
+                title=title, author=author, score=number % 10 + 1,
+                text='Длинный отзыв о просмотренном произведении. ' * 5,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def fetch(self, url, encoding):
+        plain = self.client.get(url)
+        cache.clear()
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], encoding)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        return plain.content, response.content
+
+    def test_title_page_gzip(self):
+        plain, compressed = self.fetch('/api/v1/titles/', 'gzip')
+        self.assertEqual(gzip.decompress(compressed), plain)
+        self.assertLess(len(compressed), len(plain) / 3)
+
+    def test_review_page_brotli(self):
+        plain, compressed = self.fetch(
+            f'/api/v1/titles/{self.title.pk}/reviews/'
+            '?pagination=cursor&page_size=50', 'br'
+        )
+        self.assertEqual(brotli.decompress(compressed), plain)
+        self.assertLess(len(compressed), len(plain) / 10)
+
+    def test_small_and_unaccepted_responses_untouched(self):
+        response = self.client.get(
+            f'/api/v1/titles/{self.title.pk}/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.client.get('/api/v1/titles/',
+                                   HTTP_ACCEPT_ENCODING='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        with override_settings(COMPRESSION_ENABLED=False):
+            response = self.client.get('/api/v1/titles/',
+                                       HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_etag_weak_and_revalidates(self):
+        response = self.client.get('/api/v1/titles/',
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get('/api/v1/titles/',
+                                   HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_streaming_export_compressed_in_chunks(self):
+        self.client.force_authenticate(self.admin)
+        plain = b''.join(
+            self.client.get('/api/v1/export/reviews/').streaming_content
+        )
+        response = self.client.get('/api/v1/export/reviews/',
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        body = b''.join(chunks)
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertLess(len(body), len(plain) / 10)
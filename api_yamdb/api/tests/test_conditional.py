@@ -0,0 +1,115 @@
+from unittest import mock
+
+from api.serializers import ReviewSerializer
+from api.tests import TitleTestCase
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from reviews.models import Genre, Review, User
+
+
+class ConditionalGetTests(TitleTestCase):
+    """ETag и Last-Modified для отзывов и произведений."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.ru'
+        )
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.author, text='Отзыв', score=7
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = f'/api/v1/titles/{self.title.id}/reviews/'
+
+    def test_not_modified_skips_serializer(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        with mock.patch.object(
+            ReviewSerializer, 'to_representation'
+        ) as to_representation:
+            response = self.client.get(
+                self.url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+        to_representation.assert_not_called()
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.url)
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_on_write(self):
+        etag = self.client.get(self.url)['ETag']
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(f'{self.url}{self.review.id}/', {'text': 'Новый'})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_on_untracked_write(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(
+                title=self.title, text='Из админки', score=1,
+                author=User.objects.create(username='x', email='x@yamdb.ru'),
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_title_detail(self):
+        url = f'/api/v1/titles/{self.title.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_not_modified_without_queries(self):
+        for url in (self.url, '/api/v1/titles/'):
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+
+    def test_etag_changes_on_author_rename(self):
+        urls = (self.url, f'{self.url}{self.review.id}/')
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.username = 'renamed'
+            self.author.save()
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+        self.assertEqual(response.data['author'], 'renamed')
+
+    def test_etag_changes_on_orm_edit(self):
+        urls = (self.url, f'{self.url}{self.review.id}/',
+                f'/api/v1/titles/{self.title.id}/', '/api/v1/titles/')
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.get(pk=self.review.pk)
+            review.score = 2
+            review.save()
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+
+    def test_title_etag_changes_on_genre_rename(self):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        self.title.genre.add(genre)
+        url = f'/api/v1/titles/{self.title.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            genre.name = 'Мелодрама'
+            genre.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['genre'][0]['name'], 'Мелодрама')
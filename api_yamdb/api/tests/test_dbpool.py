@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from dbpool.pool import ConnectionPool, PoolTimeoutError, pools
+from django.db import OperationalError, connection
+from django.db.utils import load_backend
+from django.test import SimpleTestCase
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Жизненный цикл соединений в пуле на файле SQLite."""
+
+    def setUp(self):
+        descriptor, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(descriptor)
+        self.addCleanup(os.remove, self.path)
+
+    def connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def test_release_and_reuse(self):
+        pool = ConnectionPool(size=2)
+        first, created = pool.acquire(self.connect)
+        pool.release(first, created)
+        again, _ = pool.acquire(self.connect)
+        self.assertIs(again, first)
+        snapshot = pool.snapshot()
+        self.assertEqual((snapshot['opened'], snapshot['reused']), (1, 1))
+        self.assertEqual((snapshot['in_use'], snapshot['idle']), (1, 0))
+
+    def test_without_pool_connections_closed(self):
+        pool = ConnectionPool(size=0)
+        raw, created = pool.acquire(self.connect)
+        pool.release(raw, created)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            raw.execute('SELECT 1')
+        snapshot = pool.snapshot()
+        self.assertEqual((snapshot['opened'], snapshot['closed']), (1, 1))
+        self.assertEqual(snapshot['in_use'], 0)
+
+    def test_waits_for_released_connection(self):
+        pool = ConnectionPool(size=1, timeout=5)
+        raw, created = pool.acquire(self.connect)
+        timer = threading.Timer(0.05, pool.release, (raw, created))
+        timer.start()
+        again, _ = pool.acquire(self.connect)
+        timer.join()
+        self.assertIs(again, raw)
+        snapshot = pool.snapshot()
+        self.assertEqual(snapshot['waits'], 1)
+        self.assertGreater(snapshot['wait_seconds'], 0)
+
+    def test_timeout(self):
+        pool = ConnectionPool(size=1, timeout=0.01)
+        pool.acquire(self.connect)
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire(self.connect)
+        self.assertEqual(pool.snapshot()['timeouts'], 1)
+
+    def test_recycle_and_failed_ping_discard(self):
+        pool = ConnectionPool(size=1, recycle=60)
+        raw, created = pool.acquire(self.connect)
+        pool.release(raw, created - 120)
+        fresh, created = pool.acquire(self.connect)
+        self.assertIsNot(fresh, raw)
+        pool.release(fresh, created)
+        fresh.close()
+        replaced, _ = pool.acquire(self.connect, ping=lambda raw: False)
+        self.assertIsNot(replaced, fresh)
+        snapshot = pool.snapshot()
+        self.assertEqual((snapshot['opened'], snapshot['closed']), (3, 2))
+        self.assertEqual(snapshot['in_use'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(size=1, timeout=0.01)
+
+        def broken():
+            raise sqlite3.OperationalError('нет связи')
+
+        with self.assertRaises(sqlite3.OperationalError):
+            pool.acquire(broken)
+        raw, _ = pool.acquire(self.connect)
+        self.assertIsNotNone(raw)
+
+
+class PooledBackendTests(SimpleTestCase):
+    """Backend dbpool.sqlite3: соединения Django проходят через пул."""
+
+    databases = ()
+
+    def setUp(self):
+        descriptor, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(descriptor)
+        self.addCleanup(os.remove, path)
+        self.alias = f'pool-test-{time.monotonic_ns()}'
+        self.addCleanup(pools.pop, self.alias, None)
+        self.settings = {
+            **connection.settings_dict,
+            'ENGINE': 'dbpool.sqlite3',
+            'NAME': path,
+            'TEST': {},
+            'POOL': {'SIZE': 1, 'TIMEOUT': 0.01},
+        }
+
+    def wrapper(self, **settings):
+        backend = load_backend('dbpool.sqlite3')
+        wrapper = backend.DatabaseWrapper(
+            {**self.settings, **settings}, alias=self.alias
+        )
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_close_returns_connection_to_pool(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertIsNone(wrapper.connection)
+        other = self.wrapper()
+        other.ensure_connection()
+        self.assertIs(other.connection, raw)
+        with other.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchone(), (1,))
+        self.assertEqual(pools[self.alias].snapshot()['reused'], 1)
+
+    def test_pool_exhausted_raises_operational_error(self):
+        self.wrapper().ensure_connection()
+        with self.assertRaises(OperationalError):
+            self.wrapper().ensure_connection()
+
+    def test_connection_closed_in_transaction_not_reused(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.set_autocommit(False)
+        wrapper.close()
+        other = self.wrapper()
+        other.ensure_connection()
+        self.assertIsNot(other.connection, raw)
+
+    def test_connection_after_error_not_reused(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        with self.assertRaises(OperationalError):
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT * FROM missing_table')
+        self.assertTrue(wrapper.errors_occurred)
+        wrapper.close()
+        other = self.wrapper()
+        other.ensure_connection()
+        self.assertIsNot(other.connection, raw)
+
+    def test_unusable_connection_not_reused(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        with mock.patch.object(wrapper, 'is_usable', return_value=False):
+            wrapper.close()
+        other = self.wrapper()
+        other.ensure_connection()
+        self.assertIsNot(other.connection, raw)
+        self.assertEqual(pools[self.alias].snapshot()['reused'], 0)
+
+    def test_health_check_replaces_broken_connection(self):
+        wrapper = self.wrapper(CONN_HEALTH_CHECKS=True, CONN_MAX_AGE=None)
+        wrapper.ensure_connection()
+        broken = wrapper.connection
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertIs(wrapper.connection, broken)
+        broken.close()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertIsNot(wrapper.connection, broken)
+        snapshot = pools[self.alias].snapshot()
+        self.assertEqual(snapshot['health_check_failures'], 1)
+        self.assertEqual((snapshot['closed'], snapshot['reused']), (1, 0))
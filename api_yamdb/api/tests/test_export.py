@@ -0,0 +1,117 @@
+import csv
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews import export
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+class ExportTests(TestCase):
+    """Потоковая выгрузка и обратная загрузка через load_test_data."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильмы', slug='films')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role=User.ADMIN,
+            bio='Пишет "в кавычках",\nс переносом'
+        )
+        cls.user = User.objects.create(
+            username='user', email='user@yamdb.ru'
+        )
+        cls.titles = [
+            Title.objects.create(
+                name=f'Фильм {number}', year=2000 + number,
+                category=category, description='Описание, с запятой'
+            )
+            for number in range(5)
+        ]
+        cls.titles[0].genre.set([drama, comedy])
+        cls.titles[1].genre.set([comedy])
+        review = Review.objects.create(
+            title=cls.titles[0], author=cls.user, text='Хорошо', score=8
+        )
+        Comment.objects.create(review=review, author=cls.admin, text='Да')
+        Title.objects.recompute_ratings()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def content(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_titles_ndjson(self):
+        response = self.client.get('/api/v1/export/titles/')
+        self.assertEqual(response['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        lines = [json.loads(line)
+                 for line in self.content(response).splitlines()]
+        self.assertEqual([line['id'] for line in lines],
+                         [title.pk for title in self.titles])
+        self.assertEqual(lines[0]['rating'], 8.0)
+        self.assertEqual(lines[0]['category'], self.titles[0].category_id)
+        self.assertEqual(
+            sorted(lines[0]['genre']),
+            sorted(self.titles[0].genre.values_list('pk', flat=True))
+        )
+        self.assertEqual(lines[2]['genre'], [])
+        self.assertEqual(list(lines[0]), export.columns('titles'))
+
+    def test_reviews_and_comments_csv(self):
+        response = self.client.get('/api/v1/export/reviews/?format=csv')
+        self.assertIn('attachment; filename="review.csv"',
+                      response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(self.content(response))))
+        self.assertEqual(rows[0]['author'], str(self.user.pk))
+        self.assertEqual(rows[0]['score'], '8')
+        response = self.client.get('/api/v1/export/comments/?format=csv')
+        rows = list(csv.DictReader(StringIO(self.content(response))))
+        self.assertEqual(list(rows[0]), export.columns('comments'))
+        self.assertEqual(rows[0]['text'], 'Да')
+
+    def test_titles_genres_one_query_per_chunk(self):
+        with CaptureQueriesContext(connection) as queries:
+            lines = list(export.rows('titles', chunk_size=2))
+        self.assertEqual(len(lines), 5)
+        genre_queries = [query for query in queries
+                         if 'reviews_title_genre' in query['sql']]
+        self.assertEqual(len(genre_queries), 3)
+
+    def test_unknown_dataset_and_permissions(self):
+        response = self.client.get('/api/v1/export/users/')
+        self.assertEqual(response.status_code, 404)
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/v1/export/titles/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_round_trip_through_load_test_data(self):
+        # Пароли и даты регистрации в раскладку не входят.
+        tables = {
+            model: list(model.objects.order_by('pk').values(*fields))
+            for model, fields in (
+                (User, export.columns('users')), (Category, ()),
+                (Genre, ()), (Title, ()), (Title.genre.through, ()),
+                (Review, ()), (Comment, ()),
+            )
+        }
+        with tempfile.TemporaryDirectory() as path:
+            call_command('export_data', path=path, stdout=StringIO())
+            call_command('load_test_data', path=path, truncate=True,
+                         stdout=StringIO())
+        for model, values in tables.items():
+            fields = list(values[0])
+            self.assertEqual(
+                list(model.objects.order_by('pk').values(*fields)), values,
+                model
+            )
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+FILES = {
+    'users.csv': 'id,username,email,role,bio,first_name,last_name\n'
+                 '100,reader,reader@yamdb.fake,user,,,\n'
+                 '101,critic,critic@yamdb.fake,moderator,Пишет,,\n',
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n2,Книга,book\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n',
+    'titles.csv': 'id,name,year,category\n'
+                  '1,Побег,1994,1\n2,Сияние,1977,2\n3,Зелёная миля,1999,1\n',
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,3,1\n',
+    'review.csv': 'id,title_id,text,author,score,pub_date\n'
+                  '1,1,Ура,100,10,2019-09-24T21:08:21.567Z\n'
+                  '2,1,Неплохо,101,6,2019-09-24T21:08:21.567Z\n',
+    'comments.csv': 'id,review_id,text,author,pub_date\n'
+                    '1,1,Согласен,101,2019-09-24T21:08:21.567Z\n',
+}
+
+
+class LoadTestDataTests(TestCase):
+    """Загрузка csv пачками, очистка, upsert и проверка ссылок."""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.write_files(FILES)
+
+    def write_files(self, files):
+        for name, content in files.items():
+            with open(os.path.join(self.path, name), 'w',
+                      encoding='utf8') as file:
+                file.write(content)
+
+    def load(self, **options):
+        call_command('load_test_data', path=self.path, stdout=StringIO(),
+                     **options)
+
+    def test_loads_all_files(self):
+        self.load()
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Title.objects.count(), 3)
+        self.assertEqual(Comment.objects.get().author.username, 'critic')
+        title = Title.objects.get(pk=1)
+        self.assertEqual((title.rating_count, title.rating), (2, 8.0))
+        self.assertEqual(list(title.genre.values_list('slug', flat=True)),
+                         ['drama'])
+        self.assertEqual(Review.objects.get(pk=1).pub_date.year, 2019)
+
+    def test_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.load(batch_size=1)
+        inserts = [query['sql'] for query in queries
+                   if query['sql'].startswith('INSERT INTO "reviews_title"')]
+        self.assertEqual(len(inserts), 3)
+        with self.assertRaises(CommandError):
+            self.load(batch_size=0)
+
+    def test_truncate(self):
+        self.load()
+        Category.objects.create(name='Музыка', slug='music')
+        self.write_files({'genre.csv': 'id,name,slug\n1,Ужасы,horror\n'})
+        self.load(truncate=True)
+        self.assertFalse(Category.objects.filter(slug='music').exists())
+        self.assertEqual(Genre.objects.get().slug, 'horror')
+        self.assertEqual(Review.objects.count(), 2)
+
+    def test_upsert_keeps_credentials_and_flags(self):
+        admin = User.objects.create_superuser(
+            username='old', email='old@yamdb.fake', password='secret',
+            pk=100,
+        )
+        self.load(upsert=True)
+        admin.refresh_from_db()
+        self.assertEqual(admin.username, 'reader')
+        self.assertTrue(admin.check_password('secret'))
+        self.assertTrue(admin.is_superuser)
+        self.assertTrue(admin.is_staff)
+        self.assertEqual(admin.token_version, 1)
+        self.write_files({'titles.csv': 'id,name,year,category\n'
+                                        '1,Побег из Шоушенка,1994,1\n'})
+        self.load(upsert=True)
+        self.assertEqual(Title.objects.get(pk=1).name, 'Побег из Шоушенка')
+        self.assertEqual(Title.objects.count(), 3)
+
+    def test_rejects_bad_or_missing_references(self):
+        for row, message in (
+            ('4,Дюна,1965,abc', 'строка 2: category должен быть id'),
+            ('4,Дюна,1965,', 'строка 2: category должен быть id'),
+            ('4,Дюна,1965,9', 'строка 2: Category с id=9 не найден'),
+        ):
+            with self.subTest(row=row):
+                self.write_files(
+                    {'titles.csv': f'id,name,year,category\n{row}\n'}
+                )
+                with self.assertRaisesMessage(CommandError, message):
+                    self.load(truncate=True)
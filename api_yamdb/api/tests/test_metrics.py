@@ -0,0 +1,67 @@
+import json
+
+from api.metrics import registry
+from api.tests import TitleTestCase
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIClient
+from reviews.models import Genre
+
+
+@override_settings(METRICS_SAMPLE_RATE=1.0, METRICS_HEADER=True,
+                   API_CACHE_TIMEOUT=0)
+class MetricsMiddlewareTests(TitleTestCase):
+    """Замеры запросов и экспорт в формате Prometheus."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+
+    def test_server_timing_header(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/titles/')
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="3 queries"', timing)
+        self.assertIn('serializer;dur=', timing)
+        self.assertIn('view;dur=', timing)
+
+    def test_log_line(self):
+        with self.settings(METRICS_LOG=True), self.assertLogs(
+            'api.metrics', 'INFO'
+        ) as logs:
+            self.client.get('/api/v1/genres/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'genres-list')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 2)
+
+    def test_prometheus_histograms(self):
+        self.client.get('/api/v1/titles/')
+        self.client.get('/api/v1/titles/')
+        response = self.client.get('/internal/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        labels = 'view="titles-list",method="GET"'
+        self.assertIn(
+            f'yamdb_db_queries_bucket{{{labels},le="5"}} 2', body
+        )
+        self.assertIn(f'yamdb_db_queries_count{{{labels}}} 2', body)
+        self.assertIn(f'yamdb_request_duration_seconds_sum{{{labels}}}', body)
+        self.assertIn('yamdb_email_queue_depth 0', body)
+        self.assertIn('# TYPE yamdb_db_connections_reused_total counter', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_request(self):
+        response = self.client.get('/api/v1/titles/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('titles-list',
+                         self.client.get('/internal/metrics/').content
+                         .decode())
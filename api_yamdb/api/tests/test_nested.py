@@ -0,0 +1,88 @@
+from api.tests import TitleTestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Review, Title, User
+
+
+class NestedParentTests(TitleTestCase):
+    """Родительские объекты вложенных маршрутов проверяются один раз."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = Title.objects.create(
+            name='Аватар', year=2009, category=cls.category
+        )
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.ru'
+        )
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role=User.ADMIN
+        )
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.author, text='Да', score=8
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.reviews = f'/api/v1/titles/{self.title.id}/reviews/'
+        self.comments = f'{self.reviews}{self.review.id}/comments/'
+
+    def parent_queries(self, url, table):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries
+                if f'FROM "{table}"' in query['sql']]
+
+    def test_title_checked_once_and_cached(self):
+        self.assertEqual(
+            len(self.parent_queries(self.reviews, 'reviews_title')), 1
+        )
+        self.assertEqual(
+            self.parent_queries(self.reviews, 'reviews_title'), []
+        )
+
+    def test_review_detail_skips_title(self):
+        self.assertEqual(self.parent_queries(
+            f'{self.reviews}{self.review.id}/', 'reviews_title'
+        ), [])
+
+    def test_comments_list_review_cached(self):
+        first = self.parent_queries(self.comments, 'reviews_review')
+        self.assertEqual(len(first), 1)
+        self.assertEqual(
+            self.parent_queries(self.comments, 'reviews_review'), []
+        )
+
+    def test_missing_parents_return_404(self):
+        self.assertEqual(
+            self.client.get('/api/v1/titles/999/reviews/').status_code, 404
+        )
+        wrong_title = (f'/api/v1/titles/{self.other.id}/reviews/'
+                       f'{self.review.id}/comments/')
+        self.assertEqual(self.client.get(wrong_title).status_code, 404)
+        self.assertEqual(
+            self.client.post(wrong_title, {'text': 'Нет'}).status_code, 404
+        )
+        self.assertEqual(
+            self.client.get(f'{wrong_title}1/').status_code, 404
+        )
+
+    def test_title_delete_drops_cached_existence(self):
+        self.client.get(self.comments)
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.delete(f'/api/v1/titles/{self.title.id}/')
+        self.assertEqual(self.client.get(self.reviews).status_code, 404)
+        self.assertEqual(self.client.get(self.comments).status_code, 404)
+
+    def test_comment_create(self):
+        response = self.client.post(self.comments, {'text': 'Согласен'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.review.comments.get().text, 'Согласен')
@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import OutgoingEmail
+from reviews.outbox import (claim_batch, deliver_pending, enqueue_mail,
+                            queue_depth, record_results)
+
+
+class SignupOutboxTest(TestCase):
+    def test_signup_enqueues_without_sending(self):
+        response = APIClient().post(
+            '/api/v1/auth/signup/',
+            {'username': 'reader', 'email': 'reader@yamdb.fake'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(queue_depth(), 1)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.recipients, 'reader@yamdb.fake')
+
+        output = StringIO()
+        call_command('send_queued_mail', once=True, stdout=output)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@yamdb.fake'])
+        self.assertIn('Код подтверждения', mail.outbox[0].body)
+        self.assertIn('в очереди: 0', output.getvalue())
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=10)
+class DeliverPendingTest(TestCase):
+    def setUp(self):
+        for number in range(3):
+            enqueue_mail('Тема', 'Текст', [f'user{number}@yamdb.fake'])
+
+    def test_batch_uses_one_connection(self):
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open',
+                        autospec=True) as open_connection:
+            self.assertEqual(deliver_pending(), (3, 0))
+        open_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(queue_depth(), 0)
+        self.assertEqual(deliver_pending(), (0, 0))
+
+    def test_batch_size(self):
+        self.assertEqual(deliver_pending(batch_size=2), (2, 0))
+        self.assertEqual(queue_depth(), 1)
+
+    def test_retry_with_backoff(self):
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.'
+                        'send_messages', side_effect=OSError('нет связи')):
+            self.assertEqual(deliver_pending(), (0, 3))
+        email = OutgoingEmail.objects.first()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'нет связи')
+        self.assertGreater(email.next_attempt_at,
+                           timezone.now() + timedelta(seconds=5))
+        self.assertEqual(deliver_pending(), (0, 0))
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.'
+                        'send_messages', side_effect=OSError('нет связи')):
+            self.assertEqual(deliver_pending(), (0, 3))
+        self.assertEqual(queue_depth(), 0)
+        self.assertEqual(
+            OutgoingEmail.objects.filter(status=OutgoingEmail.FAILED).count(),
+            3
+        )
+
+    def test_open_failure_counts_attempt(self):
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open',
+                        side_effect=ConnectionRefusedError('smtp недоступен')):
+            self.assertEqual(deliver_pending(), (0, 3))
+        self.assertEqual(len(mail.outbox), 0)
+        for email in OutgoingEmail.objects.all():
+            self.assertEqual(email.status, OutgoingEmail.PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertEqual(email.last_error, 'smtp недоступен')
+            self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(deliver_pending(), (0, 0))
+
+    def test_send_outside_transaction(self):
+        savepoints = len(connection.savepoint_ids)
+        seen = []
+
+        def send_messages(messages):
+            seen.append((
+                len(connection.savepoint_ids),
+                set(OutgoingEmail.objects.values_list('status', flat=True)),
+            ))
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.'
+                        'send_messages', side_effect=send_messages):
+            self.assertEqual(deliver_pending(), (3, 0))
+        self.assertEqual(
+            seen, [(savepoints, {OutgoingEmail.SENDING})] * 3
+        )
+        for email in OutgoingEmail.objects.all():
+            self.assertEqual(email.status, OutgoingEmail.SENT)
+            self.assertIsNone(email.leased_until)
+
+    def test_expired_lease_is_reclaimed(self):
+        claim_batch(batch_size=10)
+        self.assertEqual(queue_depth(), 3)
+        self.assertEqual(deliver_pending(), (0, 0))
+        OutgoingEmail.objects.update(leased_until=timezone.now())
+        self.assertEqual(deliver_pending(), (3, 0))
+        self.assertEqual(OutgoingEmail.objects.first().attempts, 2)
+
+    def test_stale_worker_keeps_off_reclaimed_rows(self):
+        batch = claim_batch(batch_size=10)
+        leased_until = batch[0].leased_until
+        OutgoingEmail.objects.update(leased_until=timezone.now())
+        reclaimed = claim_batch(batch_size=10)
+        for email in batch:
+            email.status = OutgoingEmail.SENT
+        record_results(batch, leased_until)
+        self.assertFalse(
+            OutgoingEmail.objects.filter(status=OutgoingEmail.SENT).exists()
+        )
+        record_results(reclaimed, reclaimed[0].leased_until)
+        self.assertFalse(
+            OutgoingEmail.objects.filter(leased_until__isnull=False).exists()
+        )
+
+    def test_worker_survives_errors(self):
+        output, errors = StringIO(), StringIO()
+        with mock.patch(
+            'reviews.management.commands.send_queued_mail.deliver_pending',
+            side_effect=[OSError('нет связи'), (3, 0), KeyboardInterrupt],
+        ), mock.patch('time.sleep') as sleep:
+            call_command('send_queued_mail', interval=1,
+                         stdout=output, stderr=errors)
+        self.assertIn('нет связи', errors.getvalue())
+        self.assertIn('Отправлено: 3', output.getvalue())
+        sleep.assert_called_once_with(1)
+
+    def test_file_backend_writes_batch_to_one_file(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        with self.settings(
+            EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend',
+            EMAIL_FILE_PATH=path,
+        ):
+            self.assertEqual(deliver_pending(), (3, 0))
+        self.assertEqual(len(os.listdir(path)), 1)
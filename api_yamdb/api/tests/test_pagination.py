@@ -0,0 +1,63 @@
+from unittest import mock
+
+from api.pagination import IdCursorPagination
+from api.tests import TitleTestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Review, User
+
+
+class ReviewCursorPaginationTests(TitleTestCase):
+    """Курсорная пагинация отзывов по запросу клиента."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(7):
+            author = User.objects.create(
+                username=f'user{i}', email=f'user{i}@yamdb.ru'
+            )
+            Review.objects.create(
+                title=cls.title, author=author, text='Отзыв', score=5
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = f'/api/v1/titles/{self.title.id}/reviews/'
+
+    def test_page_number_is_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_cursor_pages(self):
+        ids = []
+        url = f'{self.url}?pagination=cursor&page_size=3'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertNotIn('count', response.data)
+        for query in queries:
+            self.assertNotIn('COUNT', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 3)
+            ids.extend(review['id'] for review in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(
+            ids, list(Review.objects.values_list('id', flat=True))
+        )
+
+    def test_page_size_is_limited(self):
+        with mock.patch.object(IdCursorPagination, 'max_page_size', 3):
+            response = self.client.get(
+                f'{self.url}?pagination=cursor&page_size=100000'
+            )
+            self.assertEqual(len(response.data['results']), 3)
+            self.assertIsNotNone(response.data['next'])
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Title, TitleRanking
+
+
+class TitleRankingTests(TestCase):
+    """Топ произведений из материализованного рейтинга."""
+
+    @classmethod
+    def setUpTestData(cls):
+        films = Category.objects.create(name='Фильмы', slug='films')
+        books = Category.objects.create(name='Книги', slug='books')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        cls.titles = {}
+        for name, year, category, total, count in (
+            ('Один отзыв', 2000, films, 10, 1),
+            ('Много отзывов', 2001, films, 45, 5),
+            ('Без отзывов', 2002, films, 0, 0),
+            ('Плохие отзывы', 2001, books, 6, 3),
+        ):
+            cls.titles[name] = Title.objects.create(
+                name=name, year=year, category=category,
+                rating_sum=total, rating_count=count,
+                rating=total / count if count else None,
+            )
+        cls.titles['Много отзывов'].genre.add(drama)
+        cls.titles['Плохие отзывы'].genre.add(drama)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        TitleRanking.objects.refresh(prior_weight=10)
+
+    def top(self, query=''):
+        response = self.client.get(f'/api/v1/titles/top/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_bayesian_order(self):
+        data = self.top().data
+        self.assertEqual([item['name'] for item in data],
+                         ['Много отзывов', 'Один отзыв', 'Плохие отзывы'])
+        self.assertEqual([item['position'] for item in data], [1, 2, 3])
+        mean = 61 / 9
+        self.assertAlmostEqual(data[1]['weighted_rating'],
+                               (10 + 10 * mean) / 11)
+        self.assertEqual((data[1]['rating'], data[1]['rating_count']),
+                         (10, 1))
+
+    def test_filters_and_limit(self):
+        self.assertEqual(
+            [item['name'] for item in self.top('?genre=dra').data],
+            ['Много отзывов', 'Плохие отзывы']
+        )
+        self.assertEqual(
+            [item['name'] for item in self.top('?year=2001&category=bo').data],
+            ['Плохие отзывы']
+        )
+        self.assertEqual(len(self.top('?limit=1').data), 1)
+        for limit in ('0', '101', 'x'):
+            response = self.client.get(f'/api/v1/titles/top/?limit={limit}')
+            self.assertEqual(response.status_code, 400)
+
+    def test_read_is_cached_by_ranking_version(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.top().get('X-Cache'), 'MISS')
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('reviews_review' in query['sql']
+                             for query in queries))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.top().get('X-Cache'), 'HIT')
+        # Только версия рейтинга: первое место по уникальному индексу.
+        self.assertEqual(len(queries), 1)
+        self.assertIn('refreshed_at', queries[0]['sql'])
+
+    def test_command_refreshes_and_invalidates(self):
+        self.top()
+        Title.objects.filter(pk=self.titles['Без отзывов'].pk).update(
+            rating_sum=100, rating_count=10, rating=10
+        )
+        out = StringIO()
+        # Команда работает в другом процессе: версии групп кэша этого
+        # процесса она не сдвигает, ключ меняет время пересборки.
+        call_command('refresh_ranking', stdout=out)
+        self.assertIn('Мест в рейтинге: 4', out.getvalue())
+        self.assertEqual(self.top().data[0]['name'], 'Без отзывов')
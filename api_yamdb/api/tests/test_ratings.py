@@ -0,0 +1,103 @@
+from io import StringIO
+
+from api.tests import TitleTestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from reviews.models import Review, User
+
+
+class TitleRatingTests(TitleTestCase):
+    """Денормализованный рейтинг произведения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.ru'
+        )
+        cls.other = User.objects.create(
+            username='other', email='other@yamdb.ru'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.url = f'/api/v1/titles/{self.title.id}/reviews/'
+
+    def assert_rating(self, rating_sum, rating_count, rating):
+        self.title.refresh_from_db()
+        self.assertEqual(self.title.rating_sum, rating_sum)
+        self.assertEqual(self.title.rating_count, rating_count)
+        self.assertEqual(self.title.rating, rating)
+
+    def test_review_writes_update_rating(self):
+        response = self.client.post(self.url, {'text': 'Да', 'score': 8})
+        self.assertEqual(response.status_code, 201)
+        self.assert_rating(8, 1, 8.0)
+
+        Review.objects.create(
+            title=self.title, author=self.other, text='Нет', score=3
+        )
+        self.assert_rating(11, 2, 5.5)
+
+        review_url = f'{self.url}{response.data["id"]}/'
+        self.client.patch(review_url, {'score': 10})
+        self.assert_rating(13, 2, 6.5)
+
+        self.client.delete(review_url)
+        self.assert_rating(3, 1, 3.0)
+
+        response = self.client.get(f'/api/v1/titles/{self.title.id}/')
+        self.assertEqual(response.data['rating'], 3)
+
+    def test_rating_is_null_without_reviews(self):
+        response = self.client.post(self.url, {'text': 'Да', 'score': 8})
+        self.client.delete(f'{self.url}{response.data["id"]}/')
+        self.assert_rating(0, 0, None)
+
+    def test_orm_writes_update_rating(self):
+        review = Review.objects.create(
+            title=self.title, author=self.other, text='Нет', score=3
+        )
+        self.assert_rating(3, 1, 3.0)
+        review.score = 7
+        review.save()
+        review.save()
+        self.assert_rating(7, 1, 7.0)
+        self.assertEqual(
+            self.title.score_counts.values_list('score', 'count').get(
+                count__gt=0
+            ),
+            (7, 1)
+        )
+        self.client.force_authenticate(self.other)
+        response = self.client.delete(f'{self.url}{review.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_rating(0, 0, None)
+
+    def test_stale_delete_does_not_uncount_twice(self):
+        review = Review.objects.create(
+            title=self.title, author=self.other, text='Нет', score=3
+        )
+        stale = Review.objects.get(pk=review.pk)
+        review.delete()
+        self.assertEqual(stale.delete(), (0, {}))
+        self.assert_rating(0, 0, None)
+
+    def test_author_delete_uncounts_reviews(self):
+        Review.objects.create(
+            title=self.title, author=self.other, text='Нет', score=3
+        )
+        self.other.delete()
+        self.assert_rating(0, 0, None)
+
+    def test_recompute_ratings(self):
+        Review.objects.bulk_create([
+            Review(title=self.title, author=self.author, text='Да', score=9),
+            Review(title=self.title, author=self.other, text='Нет', score=4),
+        ])
+        self.assert_rating(0, 0, None)
+        call_command('recompute_ratings', stdout=StringIO())
+        self.assert_rating(13, 2, 6.5)
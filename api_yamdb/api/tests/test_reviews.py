@@ -0,0 +1,103 @@
+import threading
+from unittest import skipUnless
+
+from api.serializers import DUPLICATE_REVIEW_MESSAGE
+from api.tests import TitleTestCase, create_title
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Review, User
+
+
+class ReviewCreateTests(TitleTestCase):
+    """Повторный отзыв отсекается ограничением уникальности."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.ru'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.url = f'/api/v1/titles/{self.title.id}/reviews/'
+
+    def test_create_is_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'text': 'Да', 'score': 8})
+        self.assertEqual(response.status_code, 201)
+        selects = [query['sql'] for query in queries
+                   if query['sql'].startswith('SELECT')]
+        self.assertEqual(selects, [])
+
+    def test_duplicate_returns_400(self):
+        self.client.post(self.url, {'text': 'Да', 'score': 8})
+        response = self.client.post(self.url, {'text': 'Нет', 'score': 2})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'],
+                         [DUPLICATE_REVIEW_MESSAGE])
+        self.title.refresh_from_db()
+        self.assertEqual((self.title.rating_count, self.title.rating), (1, 8))
+
+    def test_missing_title_returns_404(self):
+        response = self.client.post(
+            '/api/v1/titles/999/reviews/', {'text': 'Да', 'score': 8}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Review.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'SQLite в памяти не допускает параллельной записи из потоков.')
+class ParallelReviewCreateTests(TransactionTestCase):
+    """Одновременные отзывы одного автора не приводят к 500."""
+
+    PARALLEL = 6
+
+    def setUp(self):
+        cache.clear()
+        self.title = create_title()
+        self.author = User.objects.create(
+            username='author', email='author@yamdb.ru'
+        )
+
+    def test_parallel_posts(self):
+        barrier = threading.Barrier(self.PARALLEL)
+        responses, errors = [], []
+
+        def post(score):
+            client = APIClient()
+            client.force_authenticate(self.author)
+            try:
+                barrier.wait()
+                responses.append(client.post(
+                    f'/api/v1/titles/{self.title.id}/reviews/',
+                    {'text': 'Параллельно', 'score': score},
+                ))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post, args=(score,))
+                   for score in range(1, self.PARALLEL + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        statuses = sorted(response.status_code for response in responses)
+        self.assertEqual(statuses, [201] + [400] * (self.PARALLEL - 1))
+        for response in responses:
+            if response.status_code == 400:
+                self.assertEqual(response.data['non_field_errors'],
+                                 [DUPLICATE_REVIEW_MESSAGE])
+        self.assertEqual(Review.objects.count(), 1)
+        self.title.refresh_from_db()
+        self.assertEqual(self.title.rating_count, 1)
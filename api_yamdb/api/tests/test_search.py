@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Review, SearchEntry, Title, User
+from reviews.search import memory_index
+
+
+class SearchTests(TestCase):
+    """Полнотекстовый поиск по произведениям, отзывам и комментариям."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильмы', slug='films')
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.ru'
+        )
+        cls.title = Title.objects.create(
+            name='Морской волк', year=1904, category=category,
+            description='Роман о капитане',
+        )
+        cls.other = Title.objects.create(
+            name='Старик и море', year=1952, category=category,
+            description='Повесть о рыбаке и море',
+        )
+        cls.review = Review.objects.create(
+            title=cls.other, author=cls.author, score=9,
+            text='Волк одиночка, капитан шхуны',
+        )
+        cls.comment = Comment.objects.create(
+            review=cls.review, author=cls.author, text='Согласен про капитана'
+        )
+
+    def setUp(self):
+        memory_index.reset()
+        self.addCleanup(memory_index.reset)
+        self.client = APIClient()
+
+    def search(self, query, **params):
+        response = self.client.get(
+            '/api/v1/search/', {'q': query, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [(item['type'], item['id'])
+                for item in response.data['results']]
+
+    def test_heading_ranks_above_text(self):
+        self.assertEqual(self.search('волк'), [
+            (SearchEntry.TITLE, self.title.id),
+            (SearchEntry.REVIEW, self.review.id),
+        ])
+
+    def test_type_filter_and_links(self):
+        response = self.client.get(
+            '/api/v1/search/', {'q': 'капитана', 'type': 'comment'}
+        )
+        self.assertEqual(response.data['count'], 1)
+        result = response.data['results'][0]
+        self.assertEqual(result['id'], self.comment.id)
+        self.assertEqual(result['title_id'], self.other.id)
+        self.assertEqual(result['review_id'], self.review.id)
+        self.assertGreater(result['rank'], 0)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.search('волк')
+        self.title.name = 'Мартин Иден'
+        self.title.save()
+        self.assertEqual(self.search('мартин'),
+                         [(SearchEntry.TITLE, self.title.id)])
+        self.review.delete()
+        self.assertEqual(self.search('волк'), [])
+        self.assertFalse(SearchEntry.objects.filter(
+            kind=SearchEntry.COMMENT, object_id=self.comment.id
+        ).exists())
+
+    def test_count_excludes_deleted(self):
+        query = {'q': 'волк капитана'}
+        response = self.client.get('/api/v1/search/', query)
+        self.assertEqual(response.data['count'], 3)
+        self.comment.delete()
+        response = self.client.get('/api/v1/search/', query)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 2)
+        self.other.delete()
+        response = self.client.get('/api/v1/search/', query)
+        self.assertEqual(response.data['count'], 1)
+        self.assertNotIn((SearchEntry.REVIEW, self.review.id),
+                         memory_index.documents)
+
+    def test_query_required(self):
+        response = self.client.get('/api/v1/search/')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v1/search/', {'q': 'волк',
+                                                       'type': 'user'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_command(self):
+        SearchEntry.objects.all().delete()
+        memory_index.reset()
+        self.assertEqual(self.search('море'), [])
+        output = StringIO()
+        call_command('rebuild_search_index', stdout=output)
+        self.assertIn('Проиндексировано документов: 4', output.getvalue())
+        self.assertEqual(self.search('море'),
+                         [(SearchEntry.TITLE, self.other.id)])
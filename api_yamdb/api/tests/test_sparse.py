@@ -0,0 +1,102 @@
+from api.tests import TitleTestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Comment, Genre, Review, User
+
+
+class SparseFieldsetTests(TitleTestCase):
+    """?fields= и ?expand=: меньше полей в ответе и колонок в запросе."""
+
+    title_fields = {'description': 'Длинное описание'}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        genres = [Genre.objects.create(name=name, slug=slug)
+                  for name, slug in (('Драма', 'drama'), ('Ужасы', 'horror'))]
+        cls.title.genre.set(genres)
+        cls.user = User.objects.create(username='critic', email='c@yamdb.ru',
+                                       first_name='Иван')
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.user, text='Отлично', score=9
+        )
+        Comment.objects.create(review=cls.review, author=cls.user, text='Да')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries]
+
+    def test_full_representation_unchanged(self):
+        response, _ = self.get('/api/v1/titles/')
+        item = response.data['results'][0]
+        self.assertEqual(item['category'], {'name': 'Фильмы', 'slug': 'films'})
+        self.assertEqual(item['description'], 'Длинное описание')
+
+    def test_title_fields_skip_joins_and_prefetch(self):
+        response, queries = self.get('/api/v1/titles/?fields=id,name,rating')
+        self.assertEqual(response.data['results'],
+                         [{'id': self.title.pk, 'name': 'Титаник',
+                           'rating': 9}])
+        self.assertFalse(any('reviews_category' in sql
+                             or 'reviews_genre' in sql for sql in queries))
+        self.assertFalse(any('"description"' in sql for sql in queries))
+
+    def test_slim_and_expanded_relations(self):
+        response, queries = self.get(
+            f'/api/v1/titles/{self.title.pk}/?fields=name,genre,category'
+        )
+        self.assertEqual(response.data, {'name': 'Титаник',
+                                         'genre': ['drama', 'horror'],
+                                         'category': 'films'})
+        genre_query = next(sql for sql in queries if 'reviews_genre' in sql)
+        self.assertNotIn('"reviews_genre"."name"',
+                         genre_query.split(' FROM ')[0])
+        response, _ = self.get(
+            f'/api/v1/titles/{self.title.pk}/?fields=name&expand=category'
+        )
+        self.assertEqual(response.data, {
+            'name': 'Титаник', 'category': {'name': 'Фильмы', 'slug': 'films'}
+        })
+
+    def test_expand_without_fields_keeps_other_relations(self):
+        full, _ = self.get('/api/v1/titles/')
+        for url in ('/api/v1/titles/?expand=genre',
+                    f'/api/v1/titles/{self.title.pk}/?expand=genre'):
+            response, _ = self.get(url)
+            item = response.data.get('results', [response.data])[0]
+            self.assertEqual(item, full.data['results'][0], url)
+            self.assertEqual(item['category'],
+                             {'name': 'Фильмы', 'slug': 'films'}, url)
+
+    def test_review_and_comment_fields(self):
+        base = f'/api/v1/titles/{self.title.pk}/reviews/'
+        response, queries = self.get(f'{base}?fields=id,score')
+        self.assertEqual(response.data['results'],
+                         [{'id': self.review.pk, 'score': 9}])
+        self.assertFalse(any('reviews_user' in sql for sql in queries))
+        response, _ = self.get(f'{base}{self.review.pk}/?expand=author')
+        self.assertEqual(response.data['author'],
+                         {'username': 'critic', 'first_name': 'Иван',
+                          'last_name': ''})
+        self.assertEqual(response.data['text'], 'Отлично')
+        response, queries = self.get(
+            f'{base}{self.review.pk}/comments/?fields=text,author'
+        )
+        self.assertEqual(response.data['results'],
+                         [{'text': 'Да', 'author': 'critic'}])
+        self.assertEqual(
+            sum('reviews_user' in sql for sql in queries), 1
+        )
+
+    def test_unknown_fields_rejected(self):
+        for query in ('?fields=name,secret', '?expand=name'):
+            response = self.client.get(f'/api/v1/titles/{query}')
+            self.assertEqual(response.status_code, 400)
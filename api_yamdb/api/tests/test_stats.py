@@ -0,0 +1,114 @@
+import statistics
+
+from api.tests import TitleTestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Review, ScoreCount, Title, User
+
+
+class TitleStatsTests(TitleTestCase):
+    """Статистика оценок из счётчиков, без чтения таблицы отзывов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = Title.objects.create(
+            name='Аватар', year=2009, category=cls.category
+        )
+        cls.users = [
+            User.objects.create(username=f'user{number}',
+                                email=f'user{number}@yamdb.ru')
+            for number in range(4)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def post_review(self, user, title, score):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                {'text': 'Отзыв', 'score': score}
+            )
+        self.assertEqual(response.status_code, 201)
+        return f'/api/v1/titles/{title.pk}/reviews/{response.data["id"]}/'
+
+    def stats(self, title):
+        response = self.client.get(f'/api/v1/titles/{title.pk}/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_stats_follow_review_writes(self):
+        for user, score in zip(self.users, (8, 3, 8, 10)):
+            url = self.post_review(user, self.title, score)
+        stats = self.stats(self.title)
+        self.assertEqual(stats['count'], 4)
+        self.assertEqual(stats['mean'], 7.25)
+        self.assertEqual(stats['median'], 8)
+        self.assertEqual(stats['histogram']['8'], 2)
+        self.assertEqual(sum(stats['histogram'].values()), 4)
+
+        self.client.force_authenticate(self.users[3])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'score': 1})
+        other_url = self.post_review(self.users[0], self.other, 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(other_url)
+        stats = self.stats(self.title)
+        scores = [8, 3, 8, 1]
+        self.assertEqual(stats['median'], statistics.median(scores))
+        self.assertEqual(stats['mean'], statistics.mean(scores))
+        self.assertEqual((stats['histogram']['10'], stats['histogram']['1']),
+                         (0, 1))
+        self.assertEqual(self.stats(self.other)['count'], 0)
+
+    def test_stats_never_read_reviews(self):
+        self.post_review(self.users[0], self.title, 7)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.stats(self.title)
+        self.assertLessEqual(len(queries), 2)
+        self.assertFalse(any('reviews_review' in query['sql']
+                             for query in queries))
+
+    def test_empty_and_missing_title(self):
+        stats = self.stats(self.title)
+        self.assertEqual(stats['count'], 0)
+        self.assertIsNone(stats['mean'])
+        self.assertIsNone(stats['median'])
+        response = self.client.get(
+            f'/api/v1/titles/{self.other.pk + 100}/stats/'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_stats(self):
+        self.post_review(self.users[0], self.title, 6)
+        self.post_review(self.users[1], self.other, 9)
+        missing = self.other.pk + 100
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f'/api/v1/titles/stats/'
+                f'?ids={self.other.pk},{missing},{self.title.pk}'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['title'] for item in response.data],
+                         [self.other.pk, self.title.pk])
+        self.assertEqual([item['mean'] for item in response.data], [9, 6])
+        self.assertFalse(any('reviews_review' in query['sql']
+                             for query in queries))
+        response = self.client.get('/api/v1/titles/stats/?ids=a,b')
+        self.assertEqual(response.status_code, 400)
+
+    def test_recompute_rebuilds_counters(self):
+        Review.objects.bulk_create([Review(
+            title=self.title, author=self.users[0], text='Да', score=4
+        )])
+        self.assertFalse(ScoreCount.objects.exists())
+        Title.objects.recompute_ratings()
+        self.assertEqual(self.stats(self.title)['histogram']['4'], 1)
+        Title.objects.recompute_ratings()
+        self.assertEqual(ScoreCount.objects.get().count, 1)
@@ -0,0 +1,144 @@
+from unittest import skipUnless
+
+from api.authentication import ClaimsAccessToken
+from api.tests import TitleTestCase
+from api.throttling import MemoryStore, RedisStore, get_store, parse_rate
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import User
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+RATES = {
+    'auth-ip': '3/min',
+    'auth-username': '2/min',
+    'write-ip': '100/min',
+    'write-user': '1/min',
+}
+
+
+class TokenBucketStoreTests(SimpleTestCase):
+    """Корзина токенов: запас, пополнение и общий счётчик узлов."""
+
+    def check_bucket(self, first, second):
+        capacity, rate = parse_rate('2/s')
+        self.assertEqual((capacity, rate), (2, 2))
+        self.assertEqual(first.take('key', capacity, rate, 100.0),
+                         (True, 1))
+        self.assertEqual(second.take('key', capacity, rate, 100.0),
+                         (True, 0))
+        allowed, tokens = first.take('key', capacity, rate, 100.25)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(tokens, 0.5)
+        self.assertTrue(second.take('key', capacity, rate, 100.5)[0])
+        self.assertTrue(first.take('other', capacity, rate, 100.5)[0])
+
+    def test_memory_store(self):
+        store = MemoryStore()
+        self.check_bucket(store, store)
+        store = MemoryStore(max_keys=1)
+        store.take('old', 1, 1, 0)
+        store.take('new', 1, 1, 0)
+        self.assertEqual(list(store.buckets), ['new'])
+
+    @skipUnless(fakeredis, 'нужен пакет fakeredis[lua]')
+    def test_redis_store_shared_between_nodes(self):
+        server = fakeredis.FakeServer()
+        self.check_bucket(
+            RedisStore(client=fakeredis.FakeRedis(server=server)),
+            RedisStore(client=fakeredis.FakeRedis(server=server)),
+        )
+
+
+@override_settings(THROTTLE_RATES=RATES, THROTTLE_STORE='memory')
+class ThrottleTests(TitleTestCase):
+    """Отказ 429 до запросов к БД."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create(username='critic', email='c@yamdb.ru')
+
+    def setUp(self):
+        cache.clear()
+        get_store().clear()
+        self.addCleanup(get_store().clear)
+        self.client = APIClient()
+
+    def signup(self, username, address='10.0.0.1'):
+        return self.client.post(
+            '/api/v1/auth/signup/',
+            {'username': username, 'email': f'{username}@yamdb.ru'},
+            REMOTE_ADDR=address,
+        )
+
+    def test_signup_limited_per_username(self):
+        for address in ('10.0.0.1', '10.0.0.2'):
+            self.assertEqual(self.signup('Spammer', address).status_code,
+                             200)
+        with self.assertNumQueries(0):
+            response = self.signup('spammer', '10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_auth_limited_per_address(self):
+        for number in range(3):
+            response = self.client.post(
+                '/api/v1/auth/token/',
+                {'username': f'user{number}', 'confirmation_code': 'x'},
+                REMOTE_ADDR='10.0.0.9',
+            )
+            self.assertEqual(response.status_code, 404)
+        with self.assertNumQueries(0):
+            response = self.signup('another', '10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.signup('another', '10.0.0.10').status_code,
+                         200)
+
+    def test_authenticated_writes_limited_per_user(self):
+        self.client.force_authenticate(self.user)
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        response = self.client.post(url, {'text': 'Да', 'score': 5})
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(0):
+            response = self.client.patch(f'{url}{response.data["id"]}/',
+                                         {'score': 6})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_forwarded_for_ignored_without_proxies(self):
+        for number in range(3):
+            response = self.client.post(
+                '/api/v1/auth/signup/',
+                {'username': f'user{number}',
+                 'email': f'user{number}@yamdb.ru'},
+                REMOTE_ADDR='10.0.0.5',
+                HTTP_X_FORWARDED_FOR=f'192.168.0.{number}',
+            )
+            self.assertEqual(response.status_code, 200)
+        response = self.signup('another', '10.0.0.5')
+        self.assertEqual(response.status_code, 429)
+
+    def test_rejected_token_write_skips_users(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(
+            ClaimsAccessToken.for_user(self.user)
+        ))
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        response = client.post(url, {'text': 'Да', 'score': 5})
+        self.assertEqual(response.status_code, 201)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(url, {'text': 'Ещё', 'score': 6})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(queries), 0)
+
+    def test_disabled(self):
+        with override_settings(THROTTLE_ENABLED=False):
+            for _ in range(3):
+                self.assertEqual(self.signup('spammer').status_code, 200)
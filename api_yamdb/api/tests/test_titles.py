@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title, User
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class TitleQueryCountTests(TestCase):
+    """Число запросов к БД не зависит от размера страницы."""
+
+    # COUNT(*) страницы, страница с категориями, жанры.
+    LIST_QUERIES = 3
+    DETAIL_QUERIES = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = [
+            Category.objects.create(name=f'Категория {i}', slug=f'cat-{i}')
+            for i in range(3)
+        ]
+        genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(3)
+        ]
+        author = User.objects.create(
+            username='author', email='author@yamdb.ru'
+        )
+        for i in range(12):
+            title = Title.objects.create(
+                name=f'Произведение {i}', year=2000,
+                category=categories[i % 3]
+            )
+            title.genre.set(genres[:i % 3 + 1])
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=i % 10 + 1
+            )
+        cls.title = title
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_list_query_count(self):
+        for page_size in (2, 5, 12):
+            with mock.patch.object(
+                PageNumberPagination, 'page_size', page_size
+            ), self.assertNumQueries(self.LIST_QUERIES):
+                response = self.client.get('/api/v1/titles/')
+            self.assertEqual(len(response.data['results']), page_size)
+
+    def test_detail_query_count(self):
+        with self.assertNumQueries(self.DETAIL_QUERIES):
+            response = self.client.get(f'/api/v1/titles/{self.title.id}/')
+        self.assertEqual(len(response.data['genre']), 3)
+        self.assertEqual(response.data['rating'], 2)
+
+    def test_rating_column(self):
+        title = Title.objects.get(pk=self.title.pk)
+        self.assertEqual(title.rating, 2.0)
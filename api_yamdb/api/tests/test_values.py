@@ -0,0 +1,96 @@
+import io
+import json
+from decimal import Decimal
+from unittest import mock
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from api.tests import TitleTestCase
+from api.views import ReviewViewSet, TitleViewSet
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from reviews.models import Genre, Review, Title, User
+
+
+class FastJSONTests(SimpleTestCase):
+    """Рендерер и парсер на orjson и их запасной путь."""
+
+    data = {'name': 'Титаник', 'rating': None, 'price': Decimal('1.50'),
+            'genre': [{'slug': 'drama'}], 1: 'ключ-число'}
+
+    def test_renderer_matches_json_renderer(self):
+        fast = FastJSONRenderer().render(self.data)
+        self.assertEqual(json.loads(fast),
+                         json.loads(JSONRenderer().render(self.data)))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        with mock.patch('api.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data),
+                             JSONRenderer().render(self.data))
+
+    def test_parser(self):
+        body = '{"name": "Титаник", "year": 1997}'.encode()
+        expected = {'name': 'Титаник', 'year': 1997}
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), expected)
+        with mock.patch('api.parsers.orjson', None):
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(body)),
+                             expected)
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name": '))
+
+
+class ValuesListTests(TitleTestCase):
+    """Список из строк .values() совпадает с ответом сериализатора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        genres = [Genre.objects.create(name=name, slug=slug)
+                  for name, slug in (('Ужасы', 'horror'), ('Драма', 'drama'))]
+        cls.title.genre.set(genres)
+        Title.objects.create(name='Аватар', year=2009, category=cls.category)
+        for number in range(3):
+            user = User.objects.create(username=f'user{number}',
+                                       email=f'user{number}@yamdb.ru')
+            Review.objects.create(title=cls.title, author=user,
+                                  text=f'Отзыв {number}', score=number + 5)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assert_same(self, viewset, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        cache.clear()
+        with mock.patch.object(viewset, 'values_list', False):
+            expected = self.client.get(url)
+        self.assertEqual(response.json(), expected.json())
+        return response.json()
+
+    def test_titles(self):
+        data = self.assert_same(TitleViewSet, '/api/v1/titles/')
+        self.assertEqual(data['results'][1]['genre'],
+                         [{'name': 'Драма', 'slug': 'drama'},
+                          {'name': 'Ужасы', 'slug': 'horror'}])
+        self.assertEqual(data['results'][1]['rating'], 6)
+        self.assert_same(TitleViewSet, '/api/v1/titles/?genre=dr')
+        self.assert_same(TitleViewSet,
+                         '/api/v1/titles/?fields=name,genre&expand=category')
+
+    def test_reviews(self):
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        data = self.assert_same(ReviewViewSet, url)
+        self.assertEqual(data['count'], 3)
+        self.assert_same(ReviewViewSet, f'{url}?pagination=cursor&page_size=2')
+        self.assert_same(ReviewViewSet, f'{url}?expand=author')
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command('benchmark_serialization', page_size=2, repeat=2,
+                     stdout=out)
+        self.assertIn('ускорение', out.getvalue())
+        self.assertTrue(Title.objects.exists())
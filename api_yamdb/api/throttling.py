@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+KEY = 'throttle:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Корзина в хэше Redis: tokens и updated. Скрипт выполняется атомарно,
+# поэтому узлы не расходуют один и тот же токен дважды.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens), 'updated', ARGV[3])
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+def parse_rate(rate):
+    """'5/min' -> (5 токенов в корзине, 5 / 60 токена в секунду)."""
+    number, period = rate.split('/')
+    capacity = int(number)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class MemoryStore:
+    """
+    Корзины в памяти процесса, для одного узла. Хранится не больше
+    max_keys корзин, давно не использованные вытесняются первыми.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now):
+        """Берёт токен: (разрешено ли, токенов осталось)."""
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return allowed, tokens
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class RedisStore:
+    """Корзины в Redis (или совместимом сервере), общие для всех узлов."""
+
+    def __init__(self, url=None, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or settings.THROTTLE_REDIS_URL)
+        self.client = client
+        self.script = client.register_script(TAKE_SCRIPT)
+
+    def take(self, key, capacity, rate, now):
+        allowed, tokens = self.script(keys=[key],
+                                      args=[capacity, rate, repr(now)])
+        return bool(allowed), float(tokens)
+
+
+STORES = {'memory': MemoryStore, 'redis': RedisStore}
+store_lock = threading.Lock()
+stores = {}
+
+
+def get_store():
+    """Хранилище корзин THROTTLE_STORE: memory, redis или путь к классу."""
+    name = settings.THROTTLE_STORE
+    with store_lock:
+        if name not in stores:
+            store_class = STORES.get(name) or import_string(name)
+            stores[name] = store_class()
+        return stores[name]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Корзина токенов scope с ёмкостью и скоростью пополнения из
+    THROTTLE_RATES. Ключ берётся только из адреса, тела запроса или
+    пользователя из токена. Троттлинг DRF идёт после аутентификации,
+    но версия токена при прогретом кэше читается без БД, поэтому
+    отказ не делает запросов к БД.
+    """
+
+    scope = None
+
+    def get_ident_key(self, request, view):
+        """
+        Ключ корзины или None, если запрос не ограничивается.
+        По умолчанию - адрес клиента (X-Forwarded-For учитывается только
+        при NUM_PROXIES > 0).
+        """
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if not settings.THROTTLE_ENABLED:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+        capacity, rate = parse_rate(settings.THROTTLE_RATES[self.scope])
+        allowed, tokens = get_store().take(
+            KEY.format(self.scope, ident), capacity, rate, time.time()
+        )
+        if not allowed:
+            self.wait_seconds = (1 - tokens) / rate
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Регистрация и получение токена с одного адреса."""
+
+    scope = 'auth-ip'
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    """Регистрация и получение токена для одного имени пользователя."""
+
+    scope = 'auth-username'
+
+    def get_ident_key(self, request, view):
+        try:
+            username = request.data.get('username')
+        except (ParseError, AttributeError):
+            return None
+        if not isinstance(username, str) or not username:
+            return None
+        return username.lower()
+
+
+class WriteIPThrottle(TokenBucketThrottle):
+    """Запись авторизованных пользователей с одного адреса."""
+
+    scope = 'write-ip'
+
+    def get_ident_key(self, request, view):
+        if request.method in SAFE_METHODS or not request.user.is_authenticated:
+            return None
+        return super().get_ident_key(request, view)
+
+
+class WriteUserThrottle(TokenBucketThrottle):
+    """Запись одного авторизованного пользователя."""
+
+    scope = 'write-user'
+
+    def get_ident_key(self, request, view):
+        if request.method in SAFE_METHODS or not request.user.is_authenticated:
+            return None
+        return request.user.pk
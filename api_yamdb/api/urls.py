@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .asyncviews import async_read_routes
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, UserViewSet, get_token,
-                    regist_user)
+                    ReviewViewSet, SearchViewSet, TitleViewSet, UserViewSet,
+                    cache_stats, export_data, get_token, regist_user)
 
 router_v1 = DefaultRouter()
 router_v1.register('genres', GenreViewSet, basename='genres')
@@ -18,9 +20,18 @@ router_v1.register(
     '/comments', CommentViewSet, basename='comments'
 )
 router_v1.register(r'users', UserViewSet)
+router_v1.register('search', SearchViewSet, basename='search')
+
+routes_v1 = router_v1.urls
+if settings.SERVER_MODE == 'asgi':
+    routes_v1 = async_read_routes(
+        routes_v1, ('titles', 'reviews', 'comments')
+    )
 
 urlpatterns = [
-    path('v1/', include(router_v1.urls)),
+    path('v1/', include(routes_v1)),
     path('v1/auth/signup/', regist_user),
     path('v1/auth/token/', get_token),
+    path('v1/cache/stats/', cache_stats),
+    path('v1/export/<slug:dataset>/', export_data),
 ]
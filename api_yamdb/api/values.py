@@ -0,0 +1,135 @@
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+
+# Поля, у которых значение из БД уже совпадает с представлением.
+PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField,
+                serializers.FloatField, serializers.BooleanField)
+
+
+def column(lookup, field):
+    """Значение колонки строки в представлении поля field."""
+    if isinstance(field, PLAIN_FIELDS):
+        return lambda row: row[lookup]
+    convert = field.to_representation
+
+    def build(row):
+        value = row[lookup]
+        return None if value is None else convert(value)
+
+    return build
+
+
+def prefixed(prefix, ordering):
+    """Сортировка связанной модели в терминах lookup-ов от prefix."""
+    return [f'-{prefix}__{name[1:]}' if name.startswith('-')
+            else f'{prefix}__{name}' for name in ordering]
+
+
+class ValuesPlan:
+    """
+    Как собрать представление сериализатора из строк .values() без
+    экземпляров моделей: колонки основной модели, FK - JOIN-ом,
+    многие-ко-многим - одним запросом к промежуточной таблице на страницу.
+    Понимает поля модели, SlugRelatedField, вложенные сериализаторы и
+    методы, колонки которых указаны в field_columns сериализатора.
+    """
+
+    def __init__(self, serializer, model):
+        self.opts = model._meta
+        self.pk = self.opts.pk.attname
+        self.lookups = [self.pk]
+        self.steps = []
+        self.many = {}
+        columns = getattr(serializer, 'field_columns', {})
+        for name, field in serializer.fields.items():
+            if name in columns:
+                self.steps.append((name, self.method(columns[name], field)))
+                continue
+            try:
+                model_field = self.opts.get_field(field.source)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f'Поле {name} нельзя собрать из .values().'
+                )
+            if model_field.many_to_many:
+                self.many[name] = (model_field, *self.related(
+                    field, model_field.m2m_reverse_field_name()
+                ))
+                self.steps.append((name, self.from_many(name)))
+            elif model_field.is_relation:
+                self.steps.append((name, self.foreign(field, model_field)))
+            else:
+                self.lookups.append(field.source)
+                self.steps.append((name, column(field.source, field)))
+
+    def method(self, lookup, field):
+        self.lookups.append(lookup)
+        return lambda row: field.to_representation(
+            SimpleNamespace(**{lookup: row[lookup]})
+        )
+
+    def foreign(self, field, model_field):
+        lookups, build = self.related(field, field.source)
+        self.lookups += lookups
+        if not model_field.null:
+            return build
+        key = model_field.attname
+        self.lookups.append(key)
+        return lambda row: None if row[key] is None else build(row)
+
+    def related(self, field, prefix):
+        """lookup-и связанной модели и сборка её представления."""
+        if isinstance(field, serializers.ManyRelatedField):
+            field = field.child_relation
+        elif isinstance(field, serializers.ListSerializer):
+            field = field.child
+        if isinstance(field, serializers.SlugRelatedField):
+            lookup = f'{prefix}__{field.slug_field}'
+            return [lookup], lambda row: row[lookup]
+        if not isinstance(field, serializers.BaseSerializer):
+            raise ImproperlyConfigured(
+                f'Связь {prefix} нельзя собрать из .values().'
+            )
+        children = [(name, column(f'{prefix}__{child.source}', child))
+                    for name, child in field.fields.items()]
+        return (
+            [f'{prefix}__{child.source}' for child in field.fields.values()],
+            lambda row: {name: build(row) for name, build in children},
+        )
+
+    def from_many(self, name):
+        return lambda row, loaded: loaded[name].get(row[self.pk], [])
+
+    def load_many(self, pks):
+        """Связи многие-ко-многим строк страницы: {поле: {pk: [...]}}."""
+        loaded = {}
+        for name, (model_field, lookups, build) in self.many.items():
+            source = f'{model_field.m2m_field_name()}_id'
+            target = model_field.m2m_reverse_field_name()
+            rows = (model_field.remote_field.through.objects
+                    .filter(**{f'{source}__in': pks})
+                    .order_by(*prefixed(
+                        target, model_field.related_model._meta.ordering
+                    ))
+                    .values(source, *lookups))
+            loaded[name] = {}
+            for row in rows:
+                loaded[name].setdefault(row[source], []).append(build(row))
+        return loaded
+
+    def values(self, queryset):
+        """queryset.values() с колонками плана, без prefetch."""
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(self.lookups)
+        )
+
+    def serialize(self, rows):
+        rows = list(rows)
+        loaded = self.load_many([row[self.pk] for row in rows])
+        return [
+            {name: build(row, loaded) if name in self.many else build(row)
+             for name, build in self.steps}
+            for row in rows
+        ]
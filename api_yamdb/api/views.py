@@ -1,88 +1,263 @@
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       renderer_classes, throttle_classes)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title, User
-
-from .filters import TitleFilter
-from .mixins import CreateDestroyListViewSet
+from rest_framework.settings import api_settings
+from reviews import export
+from reviews.models import (Category, Comment, Genre, Review, ScoreCount,
+                            SearchEntry, Title, TitleRanking, User)
+from reviews.outbox import enqueue_mail
+from reviews.search import search
+
+from .authentication import ClaimsAccessToken
+from .bulk import SlugBulkWriteMixin, TitleBulkWriteMixin
+from .cache import CachedResponseMixin, exists_cached, get_stats
+from .filters import TitleFilter, TitleRankingFilter
+from .mixins import (ConditionalGetMixin, CreateDestroyListViewSet,
+                     SparseFieldsetMixin, ValuesListMixin)
+from .pagination import OptInCursorPagination
 from .permissions import (IsAdminSuperuserOrReadOnly, IsAuthOrAdmin,
                           IsAuthorAdminModeratorOrReadOnly)
-from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, ProfileUserSerializer,
-                          RegistrUserSerializer, ReviewSerializer,
-                          TitleCreateSerializer, TokenUserSerializer,
-                          UserSerializer)
-
-
-class TitleViewSet(viewsets.ModelViewSet):
+from .renderers import CSVRenderer, NDJSONRenderer
+from .serializers import (DUPLICATE_REVIEW_MESSAGE, CategorySerializer,
+                          CommentSerializer, GenreSerializer,
+                          ProfileUserSerializer, RegistrUserSerializer,
+                          ReviewSerializer, SearchResultSerializer,
+                          TitleCreateSerializer, TitleRankingSerializer,
+                          TitleSerializer, TitleStatsSerializer,
+                          TokenUserSerializer, UserSerializer)
+from .throttling import AuthIPThrottle, AuthUsernameThrottle
+
+
+class TitleViewSet(TitleBulkWriteMixin, SparseFieldsetMixin,
+                   ConditionalGetMixin, CachedResponseMixin, ValuesListMixin,
+                   viewsets.ModelViewSet):
     """Вьюсет для работы с произведениями"""
 
-    queryset = Title.objects.all()
+    queryset = Title.objects.with_related()
     permission_classes = (IsAdminSuperuserOrReadOnly,)
     serializer_class = TitleCreateSerializer
+    sparse_serializer_class = TitleSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    cache_group = 'titles'
+
+    def get_cache_groups(self):
+        if self.action == 'top':
+            return ['ranking']
+        return super().get_cache_groups()
+
+    def get_data_version(self):
+        """Рейтинг пересобирает сервис ranking - версия из его таблицы."""
+        if self.action != 'top':
+            return None
+        refreshed_at = TitleRanking.objects.version()
+        return refreshed_at and refreshed_at.timestamp()
+
+    def stats_response(self, title_ids):
+        summaries = ScoreCount.objects.summaries(title_ids)
+        return TitleStatsSerializer(
+            [{'title': title_id, **summaries[title_id]}
+             for title_id in title_ids],
+            many=True,
+        ).data
+
+    def title_stats(self, request, *args, **kwargs):
+        try:
+            title_id = int(kwargs['pk'])
+        except ValueError:
+            raise Http404
+        if not exists_cached([f'titles:{title_id}'],
+                             Title.objects.filter(pk=title_id)):
+            raise Http404
+        return Response(self.stats_response([title_id])[0])
+
+    def titles_stats(self, request, *args, **kwargs):
+        try:
+            ids = [int(pk) for pk in request.query_params['ids'].split(',')]
+        except (KeyError, ValueError):
+            raise ValidationError(
+                {'ids': ['Укажите id произведений через запятую.']}
+            )
+        if len(ids) > settings.BULK_MAX_ITEMS:
+            raise ValidationError(
+                {'ids': [f'Не больше {settings.BULK_MAX_ITEMS} id.']}
+            )
+        existing = set(Title.objects.filter(pk__in=ids)
+                       .values_list('pk', flat=True))
+        return Response(self.stats_response(
+            [pk for pk in dict.fromkeys(ids) if pk in existing]
+        ))
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, *args, **kwargs):
+        """Количество, среднее, медиана и гистограмма оценок 1-10."""
+        return self.cached_response(self.title_stats, request, *args,
+                                    **kwargs)
+
+    @action(detail=False, methods=['get'], url_path='stats',
+            url_name='bulk-stats')
+    def bulk_stats(self, request, *args, **kwargs):
+        """Статистика оценок нескольких произведений: ?ids=1,2,3."""
+        return self.cached_response(self.titles_stats, request, *args,
+                                    **kwargs)
+
+    def top_titles(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= settings.RANKING_TOP_MAX:
+            raise ValidationError(
+                {'limit': [f'Число от 1 до {settings.RANKING_TOP_MAX}.']}
+            )
+        rankings = self.filter_queryset(
+            TitleRanking.objects.select_related('title')
+        )
+        return Response(
+            TitleRankingSerializer(rankings[:limit], many=True).data
+        )
+
+    @action(detail=False, methods=['get'],
+            filterset_class=TitleRankingFilter)
+    def top(self, request, *args, **kwargs):
+        """
+        Лучшие произведения по взвешенной оценке из рейтинга,
+        который пересобирает refresh_ranking: ?limit=10 и фильтры TitleFilter.
+        """
+        return self.cached_response(self.top_titles, request, *args,
+                                    **kwargs)
 
 
-class GenreViewSet(CreateDestroyListViewSet):
+class GenreViewSet(SlugBulkWriteMixin, ConditionalGetMixin,
+                   CachedResponseMixin, CreateDestroyListViewSet):
     """Вьюсет для работы с жанрами"""
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_group = 'genres'
+    bulk_titles_lookup = 'genre__in'
 
 
-class CategoryViewSet(CreateDestroyListViewSet):
+class CategoryViewSet(SlugBulkWriteMixin, ConditionalGetMixin,
+                      CachedResponseMixin, CreateDestroyListViewSet):
     """Вьюсет для работы с категориями"""
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_group = 'categories'
+    bulk_titles_lookup = 'category__in'
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseFieldsetMixin, ConditionalGetMixin,
+                    ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthorAdminModeratorOrReadOnly,)
+    pagination_class = OptInCursorPagination
+    send_last_modified = True
     """Вьюсет для работы с отзывами"""
 
-    def get_title(self):
+    def get_cache_group(self):
+        return f'reviews:{self.kwargs.get("title_id")}'
+
+    title_checked = False
+
+    def check_title(self):
+        """Проверяет существование произведения один раз за запрос."""
+        if self.title_checked:
+            return
         title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Title, pk=title_id)
+        if not exists_cached([f'titles:{title_id}'],
+                             Title.objects.filter(pk=title_id)):
+            raise Http404
+        self.title_checked = True
 
     def get_queryset(self):
-        title = self.get_title()
-        return title.review.all()
+        """
+        Отзыв ищется по title_id без загрузки произведения: для
+        одиночного отзыва несуществующее произведение даёт тот же 404.
+        Автор подгружается JOIN-ом, а не запросом на каждый отзыв.
+        """
+        if not self.detail:
+            self.check_title()
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        title = self.get_title()
-        author = self.request.user
-        serializer.save(author=author, title=title)
+        """
+        Повторный отзыв отсекает ограничение only_one_follow_is_possible,
+        а не предварительный SELECT: так нет гонки между проверкой и вставкой.
+        Рейтинг и счётчики оценок обновляет Review.save.
+        """
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    author=self.request.user,
+                    title_id=self.kwargs.get('title_id'),
+                )
+        except Title.DoesNotExist:
+            raise Http404
+        except IntegrityError:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_REVIEW_MESSAGE]}
+            )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(SparseFieldsetMixin, ConditionalGetMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorAdminModeratorOrReadOnly,)
+    pagination_class = OptInCursorPagination
+    send_last_modified = True
     """Вьюсет для работы с комментариями к отзывам"""
 
-    def get_review(self):
-        review_id = self.kwargs.get('review_id')
+    def get_cache_group(self):
+        return f'comments:{self.kwargs.get("review_id")}'
+
+    review_checked = False
+
+    def check_review(self, cached=True):
+        """
+        Проверяет, что отзыв относится к произведению, один раз за запрос.
+        Запись проверяет по БД, минуя кэш.
+        """
+        if self.review_checked:
+            return
         title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Review,
-                                 pk=review_id,
-                                 title__id=title_id)
+        review_id = self.kwargs.get('review_id')
+        reviews = Review.objects.filter(pk=review_id, title_id=title_id)
+        if cached:
+            exists = exists_cached(
+                [f'titles:{title_id}', f'reviews:{title_id}:{review_id}'],
+                reviews
+            )
+        else:
+            exists = reviews.exists()
+        if not exists:
+            raise Http404
+        self.review_checked = True
 
     def get_queryset(self):
-        review = self.get_review()
-        return review.comments.all()
+        if not self.detail:
+            self.check_review()
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        review = self.get_review()
+        self.check_review(cached=False)
         author = self.request.user
-        serializer.save(author=author, review=review)
+        serializer.save(author=author, review_id=self.kwargs.get('review_id'))
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -107,11 +282,12 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer_class=ProfileUserSerializer,
     )
     def profile(self, request):
-        user = request.user
         if request.method == "GET":
+            user = get_object_or_404(User, pk=request.user.pk)
             serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         if request.method == "PATCH":
+            user = get_object_or_404(User, pk=request.user.pk)
             serializer = self.get_serializer(
                 user,
                 data=request.data,
@@ -125,6 +301,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthUsernameThrottle])
 def regist_user(request):
     """Регистрация пользователей"""
 
@@ -140,7 +317,7 @@ def regist_user(request):
             User, username=serializer.validated_data["username"]
         )
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        enqueue_mail(
             subject='Код подтверждения',
             message=f'Код подтверждения для получения '
                     f'токена {confirmation_code}',
@@ -154,6 +331,7 @@ def regist_user(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthUsernameThrottle])
 def get_token(request):
     """Получение токена"""
 
@@ -165,9 +343,63 @@ def get_token(request):
         if default_token_generator.check_token(
             user, serializer.validated_data["confirmation_code"]
         ):
-            token = AccessToken.for_user(user)
+            token = ClaimsAccessToken.for_user(user)
             return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthOrAdmin])
+def cache_stats(request):
+    """Счётчики попаданий и промахов кэша ответов"""
+
+    return Response(get_stats(), status=status.HTTP_200_OK)
+
+
+EXPORT_DATASETS = ('titles', 'reviews', 'comments')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthOrAdmin])
+@renderer_classes([NDJSONRenderer, CSVRenderer])
+def export_data(request, dataset):
+    """
+    Потоковая выгрузка произведений, отзывов или комментариев
+    в ndjson или csv (?format=csv) в раскладке load_test_data.
+    """
+
+    if dataset not in EXPORT_DATASETS:
+        raise NotFound(f'Нет набора данных {dataset}.')
+    fmt = request.accepted_renderer.format
+    response = StreamingHttpResponse(
+        export.stream(dataset, fmt, settings.EXPORT_CHUNK_SIZE),
+        content_type=f'{request.accepted_renderer.media_type}; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{export.filename(dataset, fmt)}"'
+    )
+    return response
+
+
+class SearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Полнотекстовый поиск по произведениям, отзывам и комментариям:
+    ?q=<запрос>, необязательный ?type=title|review|comment.
+    """
+
+    serializer_class = SearchResultSerializer
+    permission_classes = (AllowAny,)
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': ['Обязательный параметр.']})
+        kind = self.request.query_params.get('type')
+        if kind is not None and kind not in dict(SearchEntry.KINDS):
+            raise ValidationError(
+                {'type': ['Допустимые значения: title, review, comment.']}
+            )
+        return search(query, kind)
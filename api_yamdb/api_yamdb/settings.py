@@ -40,6 +40,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,10 +83,107 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres_vlad'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Секунд жизни соединения потока между запросами, 0 - закрывать.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # Проверять сохранённое соединение перед первым запросом к БД.
+        'CONN_HEALTH_CHECKS': os.getenv('DB_HEALTH_CHECKS', default='False') == 'True',
+        # Пул соединений процесса (dbpool), SIZE=0 - без пула.
+        'POOL': {
+            'SIZE': int(os.getenv('DB_POOL_SIZE', default=0)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=30)),
+            'RECYCLE': int(os.getenv('DB_POOL_RECYCLE', default=0)),
+        },
     }
 }
 
+# Пул и проверки соединений реализованы backend-ами dbpool
+# поверх штатных PostgreSQL и SQLite.
+POOLED_ENGINES = {
+    'django.db.backends.postgresql': 'dbpool.postgresql',
+    'django.db.backends.sqlite3': 'dbpool.sqlite3',
+}
+if (DATABASES['default']['POOL']['SIZE']
+        or DATABASES['default']['CONN_HEALTH_CHECKS']):
+    DATABASES['default']['ENGINE'] = POOLED_ENGINES.get(
+        DATABASES['default']['ENGINE'], DATABASES['default']['ENGINE']
+    )
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# locmem - только для разработки и тестов: версии групп кэша и токенов не
+# видны другим воркерам и контейнерам. docker-compose.yaml задаёт общий
+# memcached: CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# (клиент pymemcache) и CACHE_LOCATION=memcached:11211.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+# Время жизни кэшированных ответов каталога в секундах, 0 - без кэша.
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+# Кэш существования произведения и отзыва во вложенных маршрутах, 0 - отключить.
+PARENT_CACHE_TIMEOUT = int(os.getenv('PARENT_CACHE_TIMEOUT', default=30))
+# Максимум объектов в одном запросе к <ресурс>/bulk/.
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', default=1000))
+# Режим сервера: wsgi (синхронные воркеры gunicorn) или asgi (uvicorn).
+# В asgi чтение произведений, отзывов и комментариев идёт в пуле
+# из ASYNC_READ_THREADS потоков, у каждого своё соединение с БД.
+SERVER_MODE = os.getenv('SERVER_MODE', default='wsgi')
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', default=8))
+# Вес априорной средней оценки в рейтинге (число «виртуальных» отзывов)
+# и максимум мест в ответе /titles/top/.
+RANKING_PRIOR_WEIGHT = float(os.getenv('RANKING_PRIOR_WEIGHT', default=10))
+RANKING_TOP_MAX = int(os.getenv('RANKING_TOP_MAX', default=100))
+# Строк, читаемых курсором из БД за раз при потоковой выгрузке.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', default=2000))
+
+# Сжатие ответов: brotli (если установлен пакет Brotli) или gzip по
+# Accept-Encoding, порядок COMPRESSION_ENCODINGS - предпочтение сервера.
+# Ответы меньше COMPRESSION_MIN_SIZE байт не сжимаются, потоковые -
+# всегда. Те же типы и порог сжимает nginx, если это выключено здесь.
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', default='True') == 'True'
+COMPRESSION_ENCODINGS = os.getenv(
+    'COMPRESSION_ENCODINGS', default='br,gzip'
+).split(',')
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', default=1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', default=6))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.getenv('COMPRESSION_BROTLI_QUALITY', default=5)
+)
+COMPRESSION_TYPES = (
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/html',
+    'text/plain', 'text/css', 'application/javascript',
+)
+
+# Конфигурация полнотекстового поиска PostgreSQL (to_tsvector).
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', default='russian')
+
+
+# Замеры запросов: доля запросов в выборке, заголовок Server-Timing
+# и строка лога api.metrics. Гистограммы отдаются по /internal/metrics/.
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', default=0.1))
+METRICS_HEADER = os.getenv('METRICS_HEADER', default='False') == 'True'
+METRICS_LOG = os.getenv('METRICS_LOG', default='False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -141,19 +240,72 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'admin@yamdb.ru'
 
+# Очередь писем: число попыток, базовая задержка повтора и время,
+# на которое воркер занимает пачку писем, в секундах.
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', default=60))
+EMAIL_OUTBOX_LEASE = int(os.getenv('EMAIL_OUTBOX_LEASE', default=300))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.ClaimsJWTAuthentication",
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend']
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.WriteIPThrottle',
+        'api.throttling.WriteUserThrottle',
+    ],
+    # Адрес клиента: 0 - REMOTE_ADDR, 1 - из X-Forwarded-For, который
+    # ставит nginx. Без прокси заголовок подделывается клиентом.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=0)),
+}
+
+# Корзины токенов: регистрация и получение токена - по адресу и имени
+# пользователя, запись авторизованных пользователей - по адресу и
+# пользователю. Ставка 'N/min': N запросов подряд, затем N в минуту.
+# Хранилище memory - в памяти процесса, redis - общее для всех узлов.
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', default='True') == 'True'
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', default='memory')
+THROTTLE_REDIS_URL = os.getenv('THROTTLE_REDIS_URL',
+                               default='redis://redis:6379/0')
+THROTTLE_RATES = {
+    'auth-ip': os.getenv('THROTTLE_AUTH_IP', default='20/min'),
+    'auth-username': os.getenv('THROTTLE_AUTH_USERNAME', default='5/min'),
+    'write-ip': os.getenv('THROTTLE_WRITE_IP', default='600/min'),
+    'write-user': os.getenv('THROTTLE_WRITE_USER', default='120/min'),
 }
 
+# JSON ответов и запросов через orjson (без него - стандартный json).
+FAST_JSON = os.getenv('FAST_JSON', default='True') == 'True'
+if FAST_JSON:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'][0] = (
+        'api.renderers.FastJSONRenderer'
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'][0] = 'api.parsers.FastJSONParser'
+
+# Время жизни кэша версии токенов пользователя.
+AUTH_VERSION_CACHE_TIMEOUT = int(
+    os.getenv('AUTH_VERSION_CACHE_TIMEOUT', default=60)
+)
+
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(days=100500),
+    "ACCESS_TOKEN_LIFETIME": timedelta(
+        minutes=int(os.getenv('ACCESS_TOKEN_MINUTES', default=30))
+    ),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "AUTH_TOKEN_CLASSES": ("api.authentication.ClaimsAccessToken",),
 }
@@ -0,0 +1,98 @@
+from django.core.signals import request_started
+from django.db import connections
+from django.dispatch import receiver
+
+from .pool import PoolTimeoutError, get_pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Управление соединениями поверх штатного backend Django.
+
+    Физические соединения берутся из пула процесса (ключ POOL настроек)
+    и возвращаются в него при close(). С CONN_HEALTH_CHECKS, как
+    в Django 4.1, соединение, пережившее запрос, проверяется SELECT 1
+    перед первым обращением к БД в следующем запросе.
+    """
+
+    health_check_done = False
+    connection_broken = False
+    pool_created = None
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def ping(self, raw):
+        try:
+            cursor = raw.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+        except self.Database.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        parent = super()
+
+        def connect():
+            return parent.get_new_connection(conn_params)
+
+        ping = None
+        if self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            ping = self.ping
+        try:
+            raw, self.pool_created = self.pool.acquire(connect, ping)
+        except PoolTimeoutError as error:
+            raise self.Database.OperationalError(str(error)) from error
+        return raw
+
+    def connect(self):
+        super().connect()
+        # Новое или только что проверенное пулом соединение.
+        self.health_check_done = True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Сломанное соединение, соединение после ошибки БД и незавершённая
+        # транзакция в пул не попадают.
+        broken = (self.connection_broken or self.in_atomic_block
+                  or not self.autocommit or self.errors_occurred
+                  or not self.is_usable())
+        self.connection_broken = False
+        with self.wrap_database_errors:
+            if broken:
+                self.pool.discard(self.connection)
+            else:
+                self.pool.release(self.connection, self.pool_created)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None or self.health_check_done
+                or self.in_atomic_block
+                or not self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            return
+        self.health_check_done = True
+        if not self.ping(self.connection):
+            self.pool.stats['health_check_failures'] += 1
+            self.connection_broken = True
+            self.close()
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
+
+
+@receiver(request_started)
+def count_persistent(sender, **kwargs):
+    """Соединения, сохранённые с прошлого запроса (CONN_MAX_AGE)."""
+    for connection in connections.all():
+        if (isinstance(connection, PooledDatabaseWrapperMixin)
+                and connection.connection is not None):
+            connection.pool.stats['persistent'] += 1
@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import Counter
+
+# Пулы процесса по alias базы данных.
+pools = {}
+pools_lock = threading.Lock()
+STATS = ('opened', 'reused', 'persistent', 'closed', 'health_check_failures',
+         'waits', 'timeouts')
+
+
+class PoolTimeoutError(Exception):
+    """Свободное соединение не появилось за отведённое время."""
+
+
+class ConnectionPool:
+    """
+    Пул соединений DB-API одного alias. Открыто не больше size
+    соединений, при size=0 пул ничего не хранит и только считает
+    открытия и закрытия. Соединения старше recycle секунд и не
+    прошедшие ping закрываются вместо повторной выдачи.
+    """
+
+    def __init__(self, size=0, timeout=30, recycle=0):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.condition = threading.Condition()
+        self.idle = []
+        self.opened = 0
+        self.stats = Counter(dict.fromkeys(STATS, 0))
+        self.wait_seconds = 0.0
+
+    def acquire(self, connect, ping=None):
+        """Пара (соединение, время открытия): из пула или новое."""
+        while True:
+            raw, created = self.take()
+            if raw is None:
+                return self.open(connect)
+            if self.expired(created) or (ping is not None and not ping(raw)):
+                self.discard(raw)
+                continue
+            self.stats['reused'] += 1
+            return raw, created
+
+    def take(self):
+        """Свободное соединение или (None, None), если можно открыть новое."""
+        waited = None
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            while self.size and not self.idle and self.opened >= self.size:
+                now = time.monotonic()
+                if waited is None:
+                    waited = now
+                    self.stats['waits'] += 1
+                if now >= deadline:
+                    self.wait_seconds += now - waited
+                    self.stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f'Нет свободного соединения за {self.timeout} с.'
+                    )
+                self.condition.wait(deadline - now)
+            if waited is not None:
+                self.wait_seconds += time.monotonic() - waited
+            if self.idle:
+                return self.idle.pop()
+            self.opened += 1
+            return None, None
+
+    def open(self, connect):
+        try:
+            raw = connect()
+        except Exception:
+            self.forget()
+            raise
+        self.stats['opened'] += 1
+        return raw, time.monotonic()
+
+    def release(self, raw, created):
+        """Возвращает соединение в пул или закрывает его."""
+        if not self.size or self.expired(created):
+            self.discard(raw)
+            return
+        with self.condition:
+            self.idle.append((raw, created))
+            self.condition.notify()
+
+    def discard(self, raw):
+        try:
+            raw.close()
+        finally:
+            self.stats['closed'] += 1
+            self.forget()
+
+    def forget(self):
+        with self.condition:
+            self.opened -= 1
+            self.condition.notify()
+
+    def expired(self, created):
+        return bool(self.recycle) and time.monotonic() - created > self.recycle
+
+    def close_idle(self):
+        """Закрывает все свободные соединения, например при остановке."""
+        with self.condition:
+            idle, self.idle = self.idle, []
+        for raw, _ in idle:
+            self.discard(raw)
+
+    def snapshot(self):
+        with self.condition:
+            return {
+                'idle': len(self.idle),
+                'in_use': self.opened - len(self.idle),
+                'wait_seconds': self.wait_seconds,
+                **self.stats,
+            }
+
+
+def get_pool(alias, settings_dict):
+    """Пул для alias, создаётся по ключу POOL настроек базы данных."""
+    with pools_lock:
+        if alias not in pools:
+            options = settings_dict.get('POOL') or {}
+            pools[alias] = ConnectionPool(
+                size=options.get('SIZE', 0),
+                timeout=options.get('TIMEOUT', 30),
+                recycle=options.get('RECYCLE', 0),
+            )
+        return pools[alias]
@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from ..base import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений и проверкой соединений."""
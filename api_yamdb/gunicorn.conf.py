@@ -0,0 +1,15 @@
+"""
+Настройки gunicorn. SERVER_MODE=wsgi - синхронные воркеры,
+SERVER_MODE=asgi - воркеры uvicorn с асинхронным чтением.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', default=1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+
+if os.getenv('SERVER_MODE', default='wsgi') == 'asgi':
+    wsgi_app = 'api_yamdb.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'api_yamdb.wsgi:application'
@@ -0,0 +1,159 @@
+import csv
+import datetime
+import os
+from collections import defaultdict, namedtuple
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Category, Comment, Genre, Review, Title, User
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+CHUNK_SIZE = 2000
+# Строки копятся в буфер такого размера и отдаются одним куском.
+BUFFER_SIZE = 64 * 1024
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    """Даты с микросекундами, чтобы выгрузка загружалась без потерь."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+ENCODER = ExportEncoder(ensure_ascii=False)
+
+# Файл в раскладке load_test_data, колонки (имя, поле модели),
+# запрос и необязательное дополнение пачки строк.
+Dataset = namedtuple(
+    'Dataset', 'filename columns queryset extend', defaults=(None,)
+)
+
+
+def add_genres(rows):
+    """Жанры пачки произведений одним запросом."""
+    genres = defaultdict(list)
+    links = Title.genre.through.objects.filter(
+        title_id__in=[row['id'] for row in rows]
+    ).order_by('pk').values_list('title_id', 'genre_id')
+    for title_id, genre_id in links:
+        genres[title_id].append(genre_id)
+    for row in rows:
+        row['genre'] = genres[row['id']]
+
+
+DATASETS = {
+    'users': Dataset('users.csv', (
+        ('id', 'id'), ('username', 'username'), ('email', 'email'),
+        ('role', 'role'), ('bio', 'bio'), ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+    ), User.objects.all),
+    'categories': Dataset('category.csv', (
+        ('id', 'id'), ('name', 'name'), ('slug', 'slug'),
+    ), Category.objects.all),
+    'genres': Dataset('genre.csv', (
+        ('id', 'id'), ('name', 'name'), ('slug', 'slug'),
+    ), Genre.objects.all),
+    'titles': Dataset('titles.csv', (
+        ('id', 'id'), ('name', 'name'), ('year', 'year'),
+        ('category', 'category_id'), ('description', 'description'),
+        ('rating', 'rating'), ('genre', None),
+    ), Title.objects.all, add_genres),
+    'genre_title': Dataset('genre_title.csv', (
+        ('id', 'id'), ('title_id', 'title_id'), ('genre_id', 'genre_id'),
+    ), Title.genre.through.objects.all),
+    'reviews': Dataset('review.csv', (
+        ('id', 'id'), ('title_id', 'title_id'), ('text', 'text'),
+        ('author', 'author_id'), ('score', 'score'),
+        ('pub_date', 'pub_date'),
+    ), Review.objects.all),
+    'comments': Dataset('comments.csv', (
+        ('id', 'id'), ('review_id', 'review_id'), ('text', 'text'),
+        ('author', 'author_id'), ('pub_date', 'pub_date'),
+    ), Comment.objects.all),
+}
+
+
+def filename(name, fmt):
+    base, _ = os.path.splitext(DATASETS[name].filename)
+    return f'{base}.{fmt}'
+
+
+def columns(name):
+    return [column for column, _ in DATASETS[name].columns]
+
+
+def rows(name, chunk_size=CHUNK_SIZE):
+    """
+    Строки набора по возрастанию id. Читаются курсором на сервере
+    пачками по chunk_size, в памяти держится одна пачка.
+    """
+    dataset = DATASETS[name]
+    fields = [(column, lookup) for column, lookup in dataset.columns
+              if lookup is not None]
+    values = (dataset.queryset().order_by('pk')
+              .values_list(*(lookup for _, lookup in fields))
+              .iterator(chunk_size=chunk_size))
+    names = [column for column, _ in fields]
+    while True:
+        chunk = [dict(zip(names, row)) for row in islice(values, chunk_size)]
+        if not chunk:
+            return
+        if dataset.extend is not None:
+            dataset.extend(chunk)
+        yield from chunk
+
+
+def cell(value):
+    """Значение для csv: даты в ISO 8601, списки через пробел."""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ' '.join(str(item) for item in value)
+    if isinstance(value, datetime.datetime):
+        return ENCODER.default(value)
+    return value
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(items):
+    for item in items:
+        yield ENCODER.encode(item) + '\n'
+
+
+def csv_lines(header, items):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for item in items:
+        yield writer.writerow([cell(item.get(column)) for column in header])
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    """Склеивает строки в куски не меньше size символов."""
+    buffer, length = [], 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream(name, fmt, chunk_size=CHUNK_SIZE):
+    """Набор данных в формате csv или ndjson кусками текста."""
+    items = rows(name, chunk_size)
+    if fmt == CSV:
+        return buffered(csv_lines(columns(name), items))
+    return buffered(ndjson_lines(items))
@@ -0,0 +1,49 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews import export
+
+# Порядок наборов совпадает с порядком загрузки в load_test_data.
+ORDER = ('users', 'categories', 'genres', 'titles', 'genre_title',
+         'reviews', 'comments')
+
+
+class Command(BaseCommand):
+    help = "Выгрузить данные в csv или ndjson в раскладке static/data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default='export',
+            help='Каталог для файлов выгрузки.'
+        )
+        parser.add_argument(
+            '--format', choices=export.FORMATS, default=export.CSV,
+            help='Формат файлов: csv (читается load_test_data) или ndjson.'
+        )
+        parser.add_argument(
+            '--only', nargs='+', choices=ORDER,
+            help='Выгрузить только перечисленные наборы.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за раз.'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше нуля.')
+        os.makedirs(options['path'], exist_ok=True)
+        for name in options['only'] or ORDER:
+            path = os.path.join(
+                options['path'], export.filename(name, options['format'])
+            )
+            started = time.monotonic()
+            with open(path, 'w', encoding='utf8', newline='') as target:
+                for chunk in export.stream(
+                    name, options['format'], options['chunk_size']
+                ):
+                    target.write(chunk)
+            self.stdout.write(
+                f"{path}: {time.monotonic() - started:.2f} с"
+            )
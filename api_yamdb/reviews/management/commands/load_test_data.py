@@ -1,97 +1,290 @@
+import os
+import time
+from contextlib import contextmanager
 from csv import DictReader
+from io import StringIO
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from api.authentication import forget_token_versions
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
 from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.search import rebuild
 
+DATA_DIR = 'static/data'
+BATCH_SIZE = 1000
+# Колонки csv, которые называются не как поле модели.
+COLUMN_ATTNAMES = {'category': 'category_id', 'author': 'author_id'}
 
-class Command(BaseCommand):
-    help = "Загрузить данные из static/data"
 
-    def handle(self, *args, **options):
+def build_user(row):
+    return User(
+        id=int(row['id']),
+        username=row['username'],
+        email=row['email'],
+        role=row['role'],
+        bio=row['bio'],
+        first_name=row['first_name'],
+        last_name=row['last_name'],
+    )
 
-        print("Загрузка данных из csv в базу:")
-
-        model = User
-
-        print(f"Загружаю {model.__name__}")
-        for row in DictReader(open("static/data/users.csv", encoding="utf8")
-                              ):
-            model.objects.create(
-                id=row['id'],
-                username=row['username'],
-                email=row['email'],
-                role=row['role'],
-                bio=row['bio'],
-                first_name=row['first_name'],
-                last_name=row['last_name'],)
-
-        model = Category
-
-        print(f"Загружаю {model.__name__}")
-        for row in DictReader(
-            open("static/data/category.csv", encoding="utf8")
-        ):
-            model.objects.create(
-                id=row['id'],
-                name=row['name'],
-                slug=row['slug'],
-            )
 
-        model = Genre
+def build_category(row):
+    return Category(id=int(row['id']), name=row['name'], slug=row['slug'])
 
-        print(f"Загружаю {model.__name__}")
-        for row in DictReader(open('static/data/genre.csv', encoding='utf8')):
-            model.objects.create(
-                id=row['id'],
-                name=row['name'],
-                slug=row['slug'],
-            )
 
-        model = Title
+def build_genre(row):
+    return Genre(id=int(row['id']), name=row['name'], slug=row['slug'])
 
-        print(f"Загружаю {model.__name__}")
-        for row in DictReader(open('static/data/titles.csv', encoding='utf8')):
-            model.objects.create(
-                id=row['id'],
-                name=row['name'],
-                year=row['year'],
-                category=Category.objects.get(id=row['category']),
-            )
 
-        model = Title.genre.through
+def build_title(row):
+    return Title(
+        id=int(row['id']),
+        name=row['name'],
+        year=int(row['year']),
+        category_id=int(row['category']),
+        description=row.get('description') or '',
+    )
+
+
+def build_genre_title(row):
+    return Title.genre.through(
+        id=int(row['id']),
+        title_id=int(row['title_id']),
+        genre_id=int(row['genre_id']),
+    )
+
+
+def build_review(row):
+    return Review(
+        id=int(row['id']),
+        title_id=int(row['title_id']),
+        text=row['text'],
+        author_id=int(row['author']),
+        score=int(row['score']),
+        pub_date=row['pub_date'],
+    )
+
+
+def build_comment(row):
+    return Comment(
+        id=int(row['id']),
+        review_id=int(row['review_id']),
+        text=row['text'],
+        author_id=int(row['author']),
+        pub_date=row['pub_date'],
+    )
+
+
+# Файл, модель, сборщик объекта и внешние ключи: колонка csv -> модель.
+DATA_FILES = (
+    ('users.csv', User, build_user, {}),
+    ('category.csv', Category, build_category, {}),
+    ('genre.csv', Genre, build_genre, {}),
+    ('titles.csv', Title, build_title, {'category': Category}),
+    ('genre_title.csv', Title.genre.through, build_genre_title,
+     {'title_id': Title, 'genre_id': Genre}),
+    ('review.csv', Review, build_review,
+     {'title_id': Title, 'author': User}),
+    ('comments.csv', Comment, build_comment,
+     {'review_id': Review, 'author': User}),
+)
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Сохраняет даты публикации из файла вместо текущего времени."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def copy_value(value):
+    if value is None:
+        return ''
+    return '"{}"'.format(str(value).replace('"', '""'))
 
-        print(f"Загружаю {model.__name__}")
-        for row in DictReader(
-            open('static/data/genre_title.csv', encoding='utf8')
-        ):
-            model.objects.create(
-                id=row['id'],
-                title_id=row['title_id'],
-                genre_id=row['genre_id'],
-            )
 
-        model = Review
-
-        print(f"Загружаю {model.__name__}")
-        for row in DictReader(open('static/data/review.csv', encoding='utf8')):
-            model.objects.create(
-                id=row['id'],
-                title_id=row['title_id'],
-                text=row['text'],
-                author=User.objects.get(id=row['author']),
-                score=row['score'],
-                pub_date=row['pub_date'],
+def copy_objects(model, objs, columns):
+    """Записывает объекты через COPY FROM STDIN (только PostgreSQL)."""
+    quote_name = connection.ops.quote_name
+    fields = model._meta.concrete_fields
+    buffer = StringIO()
+    for obj in objs:
+        buffer.write(','.join(
+            copy_value(field.get_db_prep_save(
+                getattr(obj, field.attname), connection
+            ))
+            for field in fields
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+    columns = ', '.join(quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {quote_name(model._meta.db_table)} ({columns}) '
+            f'FROM STDIN WITH (FORMAT csv)',
+            buffer,
+        )
+
+
+def insert_objects(model, objs, columns):
+    model.objects.bulk_create(objs)
+
+
+def update_fields(model, columns):
+    """Поля модели, которые есть в файле: остальные upsert не трогает."""
+    attnames = {field.attname for field in model._meta.concrete_fields
+                if not field.primary_key}
+    return [COLUMN_ATTNAMES.get(column, column) for column in columns
+            if COLUMN_ATTNAMES.get(column, column) in attnames]
+
+
+def upsert_objects(model, objs, columns):
+    """
+    Создаёт новые записи и обновляет существующие по первичному ключу.
+    Обновляются только колонки из файла: пароль и флаги пользователя,
+    которых нет в users.csv, остаются прежними.
+    """
+    existing = set(
+        model.objects.filter(pk__in=[obj.pk for obj in objs])
+        .values_list('pk', flat=True)
+    )
+    model.objects.bulk_create(
+        [obj for obj in objs if obj.pk not in existing]
+    )
+    fields = update_fields(model, columns)
+    updated = [obj for obj in objs if obj.pk in existing]
+    if fields and updated:
+        model.objects.bulk_update(updated, fields)
+    if model is User and updated:
+        # bulk_update минует User.save: выпущенные токены отзываются явно.
+        pks = [user.pk for user in updated]
+        User.objects.filter(pk__in=pks).update(
+            token_version=F('token_version') + 1
+        )
+        forget_token_versions(pks)
+
+
+class Command(BaseCommand):
+    help = "Загрузить данные из static/data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=DATA_DIR,
+            help='Каталог с csv-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество строк, записываемых одним запросом.'
+        )
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            '--truncate', action='store_true',
+            help='Очистить таблицы перед загрузкой.'
+        )
+        mode.add_argument(
+            '--upsert', action='store_true',
+            help='Обновлять уже существующие записи по id.'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY FROM STDIN в PostgreSQL.'
+        )
+
+    def handle(self, *args, **options):
+        self.known_ids = {}
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        if options['upsert']:
+            write = upsert_objects
+        elif connection.vendor == 'postgresql' and not options['no_copy']:
+            write = copy_objects
+        else:
+            write = insert_objects
+
+        self.stdout.write("Загрузка данных из csv в базу:")
+        if options['truncate']:
+            self.truncate()
+        for filename, model, build, references in DATA_FILES:
+            self.load(
+                os.path.join(options['path'], filename), model, build,
+                references, write, options['batch_size']
             )
+        self.reset_sequences()
+        Title.objects.recompute_ratings()
+        with transaction.atomic():
+            self.stdout.write(f"Проиндексировано документов: {rebuild()}")
 
-        model = Comment
-
-        print(f"Загружаю {model.__name__}")
-        for row in DictReader(open('static/data/comments.csv', encoding='utf8')
-                              ):
-            model.objects.create(
-                id=row['id'],
-                review_id=row['review_id'],
-                text=row['text'],
-                author=User.objects.get(id=row['author']),
-                pub_date=row['pub_date'],
+    def truncate(self):
+        tables = [model._meta.db_table for _, model, _, _ in DATA_FILES]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in connection.ops.sql_flush(
+                no_style(), tables[::-1], allow_cascade=True
+            ):
+                cursor.execute(sql)
+
+    def reset_sequences(self):
+        models = [model for _, model, _, _ in DATA_FILES
+                  if not model._meta.auto_created]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    def get_known_ids(self, model):
+        """Множество id модели, загружается из БД один раз."""
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True)
             )
+        return self.known_ids[model]
+
+    def check_references(self, path, line, row, references):
+        for column, model in references.items():
+            try:
+                pk = int(row[column])
+            except (KeyError, TypeError, ValueError):
+                raise CommandError(
+                    f'{path}, строка {line}: {column} должен быть id '
+                    f'{model.__name__}, получено {row.get(column)!r}.'
+                )
+            if pk not in self.get_known_ids(model):
+                raise CommandError(
+                    f'{path}, строка {line}: {model.__name__} '
+                    f'с id={row[column]} не найден.'
+                )
+
+    def load(self, path, model, build, references, write, batch_size):
+        self.stdout.write(f"Загружаю {model.__name__}")
+        started = time.monotonic()
+        total = 0
+        source = open(path, encoding='utf8')
+        with source, transaction.atomic(), keep_auto_now_add(model):
+            reader = DictReader(source)
+            rows = enumerate(reader, start=2)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                objs = []
+                for line, row in batch:
+                    self.check_references(path, line, row, references)
+                    objs.append(build(row))
+                try:
+                    write(model, objs, reader.fieldnames)
+                except IntegrityError as error:
+                    raise CommandError(f'{path}: {error}')
+                total += len(objs)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"  {total} строк за {elapsed:.2f} с "
+            f"({total / elapsed:.0f} строк/с)"
+        )
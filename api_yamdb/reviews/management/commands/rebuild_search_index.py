@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.search import rebuild
+
+
+class Command(BaseCommand):
+    help = "Пересоздать поисковый индекс произведений, отзывов и комментариев"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            total = rebuild(options['batch_size'])
+        self.stdout.write(
+            f"Проиндексировано документов: {total} "
+            f"за {time.monotonic() - started:.1f} с"
+        )
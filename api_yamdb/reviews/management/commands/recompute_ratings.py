@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = "Пересчитать рейтинги произведений по таблице отзывов"
+
+    def handle(self, *args, **options):
+        updated = Title.objects.recompute_ratings()
+        self.stdout.write(f"Пересчитан рейтинг произведений: {updated}")
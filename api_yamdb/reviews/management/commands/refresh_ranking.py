@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.models import TitleRanking
+
+
+class Command(BaseCommand):
+    help = "Пересобрать рейтинг произведений для /api/v1/titles/top/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prior-weight', type=float,
+            default=settings.RANKING_PRIOR_WEIGHT,
+            help='Вес средней оценки по всем отзывам, в отзывах.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Пересобирать каждые N секунд, 0 - один раз.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                started = time.monotonic()
+                total = TitleRanking.objects.refresh(
+                    options['prior_weight'], options['batch_size']
+                )
+                self.stdout.write(
+                    f"Мест в рейтинге: {total} "
+                    f"за {time.monotonic() - started:.1f} с"
+                )
+                if not options['interval']:
+                    return
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Остановлено")
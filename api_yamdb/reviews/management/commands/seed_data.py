@@ -0,0 +1,118 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.search import rebuild
+
+WORDS = (
+    'война', 'мир', 'время', 'город', 'море', 'ночь', 'солнце', 'дорога',
+    'небо', 'сердце', 'тень', 'огонь', 'река', 'звезда', 'лес', 'дом',
+    'ветер', 'снег', 'остров', 'песня', 'тайна', 'герой', 'сон', 'путь',
+)
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = "Заполнить базу синтетическими данными для нагрузочных тестов"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews-per-title', type=int, default=10)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--random-seed', type=int, default=0,
+            help='Зерно генератора, одинаковое зерно даёт одинаковые данные.'
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['random_seed'])
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+        with transaction.atomic():
+            self.seed(options)
+            rebuild(self.batch_size)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [User, Category, Genre, Title, Review, Comment]
+            ):
+                cursor.execute(sql)
+        self.stdout.write(
+            f"Данные созданы за {time.monotonic() - started:.1f} с"
+        )
+
+    def phrase(self, words):
+        return ' '.join(self.random.sample(WORDS, words))
+
+    def create(self, model, objs):
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+        self.stdout.write(f"  {model.__name__}: {len(objs)}")
+        return [obj.pk for obj in objs]
+
+    def seed(self, options):
+        start = next_id(User)
+        users = self.create(User, [
+            User(id=pk, username=f'seed{pk}', email=f'seed{pk}@yamdb.fake')
+            for pk in range(start, start + options['reviews_per_title'])
+        ])
+        start = next_id(Category)
+        categories = self.create(Category, [
+            Category(id=pk, name=self.phrase(1), slug=f'seed-category-{pk}')
+            for pk in range(start, start + options['categories'])
+        ])
+        start = next_id(Genre)
+        genres = self.create(Genre, [
+            Genre(id=pk, name=self.phrase(1), slug=f'seed-genre-{pk}')
+            for pk in range(start, start + options['genres'])
+        ])
+        start = next_id(Title)
+        titles = self.create(Title, [
+            Title(
+                id=pk,
+                name=self.phrase(3),
+                year=self.random.randint(1900, 2020),
+                category_id=self.random.choice(categories),
+                description=self.phrase(5),
+            )
+            for pk in range(start, start + options['titles'])
+        ])
+        genre_title = Title.genre.through
+        self.create(genre_title, [
+            genre_title(title_id=title_id, genre_id=genre_id)
+            for title_id in titles
+            for genre_id in self.random.sample(genres, min(2, len(genres)))
+        ])
+        start = next_id(Review)
+        reviews = self.create(Review, [
+            Review(
+                id=start + index,
+                title_id=title_id,
+                author_id=author_id,
+                text=self.phrase(8),
+                score=self.random.randint(1, 10),
+            )
+            for index, (title_id, author_id) in enumerate(
+                (title_id, author_id)
+                for title_id in titles for author_id in users
+            )
+        ])
+        self.create(Comment, [
+            Comment(
+                review_id=review_id,
+                author_id=self.random.choice(users),
+                text=self.phrase(6),
+            )
+            for review_id in reviews
+            for _ in range(options['comments_per_review'])
+        ])
+        if titles:
+            Title.objects.filter(pk__gte=titles[0]).recompute_ratings()
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from reviews.outbox import deliver_pending, queue_depth
+
+
+class Command(BaseCommand):
+    help = "Отправлять письма из очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Количество писем, отправляемых через одно соединение.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить одну пачку и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                try:
+                    sent, failed = deliver_pending(options['batch_size'])
+                except Exception as error:
+                    self.stderr.write(f"Ошибка отправки: {error}")
+                    time.sleep(options['interval'])
+                    continue
+                if sent or failed or options['once']:
+                    self.stdout.write(
+                        f"Отправлено: {sent}, ошибок: {failed}, "
+                        f"в очереди: {queue_depth()}"
+                    )
+                if options['once']:
+                    return
+                if not sent and not failed:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Остановлено")
@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 02:35
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+import reviews.validators
+
+
+def fill_score_counts(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    ScoreCount = apps.get_model('reviews', 'ScoreCount')
+    groups = (Review.objects.order_by().values_list('title_id', 'score')
+              .annotate(total=Count('pk')))
+    ScoreCount.objects.bulk_create([
+        ScoreCount(title_id=title_id, score=score, count=total)
+        for title_id, score, total in groups
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_search_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(validators=[reviews.validators.validate_score], verbose_name='Оценка')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_counts', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Счётчик оценок',
+                'verbose_name_plural': 'Счётчики оценок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scorecount',
+            constraint=models.UniqueConstraint(fields=('title', 'score'), name='unique_score_count'),
+        ),
+        migrations.RunPython(fill_score_counts, migrations.RunPython.noop),
+    ]
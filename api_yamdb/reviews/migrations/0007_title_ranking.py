@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 02:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_score_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('position', models.PositiveIntegerField(unique=True, verbose_name='Место')),
+                ('weighted_rating', models.FloatField(verbose_name='Взвешенная оценка')),
+                ('rating', models.FloatField(null=True, verbose_name='Средняя оценка')),
+                ('rating_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Рейтинг произведений',
+                'ordering': ('position',),
+            },
+        ),
+    ]
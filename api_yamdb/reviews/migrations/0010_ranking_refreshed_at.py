@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-18 03:06
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_reserved_slugs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='titleranking',
+            name='refreshed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Пересобран'),
+        ),
+    ]
@@ -1,8 +1,16 @@
+from itertools import islice
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, models, transaction
+from django.db.models import Avg, Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 
-from .validators import validate_score, validate_year
+from .validators import validate_score, validate_slug, validate_year
 
 
 class Genre(models.Model):
@@ -12,12 +20,14 @@ class Genre(models.Model):
     slug = models.SlugField(
         max_length=50,
         unique=True,
+        validators=(validate_slug,),
     )
 
     class Meta:
         verbose_name = 'Жанр'
         verbose_name_plural = 'Жанры'
         ordering = ('name',)
+        indexes = (models.Index(fields=('name',), name='genre_name_idx'),)
 
     def __str__(self):
         return self.slug
@@ -30,17 +40,62 @@ class Category(models.Model):
     slug = models.SlugField(
         max_length=50,
         unique=True,
+        validators=(validate_slug,),
     )
 
     class Meta:
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
         ordering = ('name',)
+        indexes = (
+            models.Index(fields=('name',), name='category_name_idx'),
+        )
 
     def __str__(self):
         return self.slug
 
 
+class TitleQuerySet(models.QuerySet):
+    """Запросы к произведениям с денормализованным рейтингом."""
+
+    def with_related(self):
+        """Подгружает категорию JOIN-ом и жанры одним доп. запросом."""
+        return self.select_related('category').prefetch_related('genre')
+
+    def update_rating(self, score_delta, count_delta):
+        """Инкрементально изменяет сумму оценок, число отзывов и средний балл.
+
+        Выполняется одним UPDATE, поэтому безопасен при параллельной записи.
+        """
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        return self.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=(Cast(rating_sum, models.FloatField())
+                    / NullIf(rating_count, 0)),
+        )
+
+    def recompute_ratings(self):
+        """
+        Пересчитывает рейтинг одним запросом и счётчики оценок
+        по таблице отзывов.
+        """
+        ScoreCount.objects.rebuild(self)
+        reviews = (Review.objects.filter(title=OuterRef('pk'))
+                   .order_by().values('title'))
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score'))
+                         .values('total')), 0),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk'))
+                         .values('total')), 0),
+            rating=Subquery(reviews.annotate(average=Avg('score'))
+                            .values('average')),
+        )
+
+
 class Title(models.Model):
     """Модель Произведений"""
 
@@ -65,11 +120,33 @@ class Title(models.Model):
         max_length=100,
         blank=True,
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    rating = models.FloatField(
+        'Средняя оценка',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
+        indexes = (
+            models.Index(fields=('name',), name='title_name_idx'),
+            models.Index(fields=('year',), name='title_year_idx'),
+        )
 
     def __str__(self):
         return self.name
@@ -107,12 +184,41 @@ class User(AbstractUser):
         'Биография',
         blank=True,
     )
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=0,
+        editable=False,
+    )
+
+    # Поля, попадающие в токен: их изменение отзывает выпущенные токены.
+    TOKEN_FIELDS = ('username', 'role', 'is_staff', 'is_superuser',
+                    'is_active')
 
     class Meta:
         ordering = ('id',)
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if not self._state.adding and (
+            update_fields is None
+            or set(update_fields) & set(self.TOKEN_FIELDS)
+        ):
+            stored = User.objects.filter(pk=self.pk).values(
+                'token_version', *self.TOKEN_FIELDS
+            ).first()
+            if stored is not None and any(
+                stored[field] != getattr(self, field)
+                for field in self.TOKEN_FIELDS
+            ):
+                self.token_version = stored['token_version'] + 1
+                if update_fields is not None:
+                    kwargs['update_fields'] = {
+                        *update_fields, 'token_version'
+                    }
+        super().save(*args, **kwargs)
+
     @property
     def is_moderator(self):
         return self.role == self.MODERATOR
@@ -152,6 +258,9 @@ class Review(models.Model):
         verbose_name = 'Отзыв к произведению'
         verbose_name_plural = 'Отзывы к произведениям'
         ordering = ('-id',)
+        indexes = (
+            models.Index(fields=('title', '-id'), name='review_title_id_idx'),
+        )
         constraints = [
             models.UniqueConstraint(
                 fields=('author', 'title'),
@@ -161,6 +270,36 @@ class Review(models.Model):
     def __str__(self) -> str:
         return self.text[:settings.TEXT_VISIBLE_SYMBOLS]
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет отзыв и в той же транзакции сдвигает рейтинг и счётчики
+        оценок, через что бы ни шла запись: API, админку или shell.
+        Прежняя оценка читается с блокировкой строки, поэтому
+        параллельные изменения одного отзыва не сбивают суммы.
+        """
+        with transaction.atomic():
+            old = None
+            if not self._state.adding:
+                old = Review.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('title_id', 'score').first()
+            super().save(*args, **kwargs)
+            if old == (self.title_id, self.score):
+                return
+            if old is not None:
+                count_score(*old, -1)
+            if not count_score(self.title_id, self.score, 1):
+                raise Title.DoesNotExist('Произведение не найдено')
+
+    def delete(self, *args, **kwargs):
+        """Удаляет отзыв, если его ещё не удалил параллельный запрос."""
+        with transaction.atomic():
+            if not Review.objects.select_for_update().filter(
+                pk=self.pk
+            ).exists():
+                return 0, {}
+            return super().delete(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель Комментариев к Отзывам"""
@@ -189,6 +328,317 @@ class Comment(models.Model):
         verbose_name = 'Комментарий к отзыву'
         verbose_name_plural = 'Комментарии к отзывам'
         ordering = ('-id',)
+        indexes = (
+            models.Index(fields=('review', '-id'),
+                         name='comment_review_id_idx'),
+        )
 
     def __str__(self) -> str:
         return self.text[:settings.TEXT_VISIBLE_SYMBOLS]
+
+
+SCORES = range(1, 11)
+
+
+def median(histogram, count):
+    """Медиана по счётчикам оценок без разворачивания в список."""
+    if not count:
+        return None
+    # Номера средних элементов: один при нечётном count, два при чётном.
+    middle = sorted({(count - 1) // 2, count // 2})
+    values, seen = [], 0
+    for score in SCORES:
+        seen += histogram.get(score, 0)
+        while middle and middle[0] < seen:
+            middle.pop(0)
+            values.append(score)
+    return sum(values) / len(values)
+
+
+def summarize(histogram):
+    """Количество, среднее, медиана и гистограмма 1-10 по счётчикам."""
+    count = sum(histogram.get(score, 0) for score in SCORES)
+    total = sum(score * histogram.get(score, 0) for score in SCORES)
+    return {
+        'count': count,
+        'mean': total / count if count else None,
+        'median': median(histogram, count),
+        'histogram': {str(score): histogram.get(score, 0)
+                      for score in SCORES},
+    }
+
+
+class ScoreCountQuerySet(models.QuerySet):
+    """Счётчики оценок, которые меняются вместе с отзывами."""
+
+    def change(self, title_id, score, delta):
+        """Сдвигает счётчик оценки одним UPDATE, строка создаётся один раз."""
+        counter = self.filter(title_id=title_id, score=score)
+        if counter.update(count=F('count') + delta) or delta < 0:
+            return
+        try:
+            with transaction.atomic():
+                self.create(title_id=title_id, score=score, count=delta)
+        except IntegrityError:
+            # Строку одновременно создал параллельный отзыв.
+            counter.update(count=F('count') + delta)
+
+    def summaries(self, title_ids):
+        """Статистика по каждому произведению из title_ids."""
+        histograms = {title_id: {} for title_id in title_ids}
+        rows = self.filter(title_id__in=title_ids).values_list(
+            'title_id', 'score', 'count'
+        )
+        for title_id, score, count in rows:
+            histograms[title_id][score] = count
+        return {title_id: summarize(histogram)
+                for title_id, histogram in histograms.items()}
+
+    def rebuild(self, titles, batch_size=1000):
+        """Пересоздаёт счётчики произведений titles по таблице отзывов."""
+        title_ids = titles.values('pk')
+        self.filter(title__in=title_ids).delete()
+        groups = (Review.objects.filter(title__in=title_ids).order_by()
+                  .values_list('title_id', 'score')
+                  .annotate(total=Count('pk'))
+                  .iterator(chunk_size=batch_size))
+        while True:
+            batch = [ScoreCount(title_id=title_id, score=score, count=total)
+                     for title_id, score, total in islice(groups, batch_size)]
+            if not batch:
+                return
+            self.bulk_create(batch)
+
+
+class ScoreCount(models.Model):
+    """Количество отзывов произведения с одной оценкой"""
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts',
+        verbose_name='Произведение',
+    )
+    score = models.PositiveSmallIntegerField(
+        'Оценка',
+        validators=(validate_score,)
+    )
+    count = models.PositiveIntegerField('Количество отзывов', default=0)
+
+    objects = ScoreCountQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Счётчик оценок'
+        verbose_name_plural = 'Счётчики оценок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'score'),
+                name='unique_score_count')
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score} x {self.count}'
+
+
+def count_score(title_id, score, delta):
+    """Добавляет (delta=1) или убирает (delta=-1) оценку произведения."""
+    updated = Title.objects.filter(pk=title_id).update_rating(
+        score * delta, delta
+    )
+    if updated:
+        ScoreCount.objects.change(title_id, score, delta)
+    return updated
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    """Убирает оценку и при каскадном удалении вместе с пользователем."""
+    count_score(instance.title_id, instance.score, -1)
+
+
+class TitleRankingQuerySet(models.QuerySet):
+    """Материализованный рейтинг произведений для топов."""
+
+    def refresh(self, prior_weight, batch_size=1000):
+        """
+        Пересобирает рейтинг по суммам оценок из Title, не читая отзывы.
+        Взвешенная оценка по Байесу (sum + m * C) / (count + m), где C -
+        средняя оценка по всем отзывам, m - prior_weight: у произведений
+        с малым числом отзывов она ближе к C. Все места получают одно
+        время пересборки refreshed_at - версию рейтинга для кэша.
+        """
+        totals = Title.objects.aggregate(
+            total=Sum('rating_sum'), reviews=Sum('rating_count')
+        )
+        mean = (totals['total'] or 0) / (totals['reviews'] or 1)
+        weighted = (
+            (Cast('rating_sum', models.FloatField())
+             + Value(prior_weight * mean, models.FloatField()))
+            / (Cast('rating_count', models.FloatField())
+               + Value(prior_weight, models.FloatField()))
+        )
+        rows = (Title.objects.filter(rating_count__gt=0)
+                .annotate(weighted=weighted)
+                .order_by('-weighted', '-rating_count', 'pk')
+                .values_list('pk', 'weighted', 'rating', 'rating_count')
+                .iterator(chunk_size=batch_size))
+        total = 0
+        refreshed_at = timezone.now()
+        with transaction.atomic():
+            self.all().delete()
+            while True:
+                batch = [
+                    TitleRanking(title_id=title_id, position=position,
+                                 weighted_rating=weighted_rating,
+                                 rating=rating, rating_count=rating_count,
+                                 refreshed_at=refreshed_at)
+                    for position, (title_id, weighted_rating, rating,
+                                   rating_count)
+                    in enumerate(islice(rows, batch_size), start=total + 1)
+                ]
+                if not batch:
+                    return total
+                self.bulk_create(batch)
+                total += len(batch)
+
+    def version(self):
+        """Время последней пересборки, None у пустого рейтинга."""
+        return self.order_by('position').values_list(
+            'refreshed_at', flat=True
+        ).first()
+
+
+class TitleRanking(models.Model):
+    """Место произведения в рейтинге по взвешенной оценке"""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='Произведение',
+    )
+    position = models.PositiveIntegerField('Место', unique=True)
+    weighted_rating = models.FloatField('Взвешенная оценка')
+    rating = models.FloatField('Средняя оценка', null=True)
+    rating_count = models.PositiveIntegerField('Количество отзывов')
+    refreshed_at = models.DateTimeField('Пересобран', default=timezone.now)
+
+    objects = TitleRankingQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Рейтинг произведений'
+        ordering = ('position',)
+
+    def __str__(self):
+        return f'{self.position}. {self.title_id}'
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку"""
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не удалось отправить'),
+    )
+
+    subject = models.CharField('Тема', max_length=255)
+    message = models.TextField('Текст письма')
+    from_email = models.CharField(
+        'Отправитель',
+        max_length=254,
+        blank=True,
+    )
+    recipients = models.TextField('Получатели, по одному в строке')
+    status = models.CharField(
+        'Статус',
+        max_length=20,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Количество попыток',
+        default=0,
+    )
+    next_attempt_at = models.DateTimeField(
+        'Время следующей попытки',
+        default=timezone.now,
+    )
+    leased_until = models.DateTimeField(
+        'Отправка занята до',
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Дата постановки в очередь',
+                                   auto_now_add=True)
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ('id',)
+        indexes = (
+            models.Index(fields=('status', 'next_attempt_at'),
+                         name='outbox_pending_idx'),
+        )
+
+    def __str__(self):
+        return self.subject
+
+
+class SearchEntry(models.Model):
+    """Документ полнотекстового поиска"""
+
+    TITLE = 'title'
+    REVIEW = 'review'
+    COMMENT = 'comment'
+    KINDS = (
+        (TITLE, 'Произведение'),
+        (REVIEW, 'Отзыв'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField('Тип', max_length=10, choices=KINDS)
+    object_id = models.PositiveBigIntegerField('id объекта')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+    )
+    review = models.ForeignKey(
+        Review,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+    )
+    heading = models.CharField('Заголовок', max_length=256, blank=True)
+    body = models.TextField('Текст', blank=True)
+    # Заполняется только в PostgreSQL, GIN-индекс создаёт миграция.
+    vector = SearchVectorField(null=True)
+
+    class Meta:
+        verbose_name = 'Поисковый документ'
+        verbose_name_plural = 'Поисковые документы'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('kind', 'object_id'),
+                name='unique_search_entry')
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
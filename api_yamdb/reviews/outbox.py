@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_mail(subject, message, recipient_list, from_email=None):
+    """Ставит письмо в очередь вместо синхронной отправки по SMTP."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email or '',
+        recipients='\n'.join(recipient_list),
+    )
+
+
+def queue_depth():
+    return OutgoingEmail.objects.filter(
+        status__in=(OutgoingEmail.PENDING, OutgoingEmail.SENDING)
+    ).count()
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка: 1, 2, 4, ... базовых интервала."""
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def record_failure(email, error):
+    """Откладывает письмо с растущей задержкой или помечает неотправленным."""
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.FAILED
+    else:
+        email.status = OutgoingEmail.PENDING
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+
+
+def send_batch(batch, connection):
+    """Отправляет письма через открытое соединение."""
+    sent = failed = 0
+    for email in batch:
+        try:
+            EmailMessage(
+                subject=email.subject,
+                body=email.message,
+                from_email=email.from_email or None,
+                to=email.recipients.splitlines(),
+                connection=connection,
+            ).send()
+        except Exception as error:
+            failed += 1
+            record_failure(email, error)
+        else:
+            sent += 1
+            email.status = OutgoingEmail.SENT
+            email.sent_at = timezone.now()
+    return sent, failed
+
+
+def claim_batch(batch_size):
+    """
+    Занимает пачку готовых писем в короткой транзакции: письма
+    переходят в SENDING с арендой на EMAIL_OUTBOX_LEASE секунд,
+    попытка засчитывается сразу. Письма, аренда которых истекла
+    (воркер остановился посреди отправки), занимаются снова.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=OutgoingEmail.PENDING, next_attempt_at__lte=now)
+                | Q(status=OutgoingEmail.SENDING, leased_until__lte=now)
+            )
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        leased_until = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        for email in batch:
+            email.status = OutgoingEmail.SENDING
+            email.leased_until = leased_until
+            email.attempts += 1
+        OutgoingEmail.objects.bulk_update(
+            batch, ('status', 'leased_until', 'attempts')
+        )
+    return batch
+
+
+def record_results(batch, leased_until):
+    """
+    Сохраняет результаты отправки. Письма, которые после истечения
+    аренды занял другой воркер, не перезаписываются.
+    """
+    with transaction.atomic():
+        owned = set(
+            OutgoingEmail.objects.select_for_update()
+            .filter(pk__in=[email.pk for email in batch],
+                    status=OutgoingEmail.SENDING, leased_until=leased_until)
+            .values_list('pk', flat=True)
+        )
+        batch = [email for email in batch if email.pk in owned]
+        for email in batch:
+            email.leased_until = None
+        OutgoingEmail.objects.bulk_update(
+            batch,
+            ('status', 'next_attempt_at', 'leased_until', 'last_error',
+             'sent_at')
+        )
+
+
+def deliver_pending(batch_size=100, connection=None):
+    """
+    Отправляет пачку готовых к отправке писем через одно соединение.
+    Письма занимаются и результаты записываются в отдельных коротких
+    транзакциях, SMTP работает вне транзакции и без блокировок строк.
+    Ошибочные письма откладываются с растущей задержкой, после
+    EMAIL_OUTBOX_MAX_ATTEMPTS попыток помечаются как неотправленные.
+    Если соединение не открылось, попытка засчитывается всей пачке.
+    Возвращает количество отправленных и неудачных писем.
+    """
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+    leased_until = batch[0].leased_until
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in batch:
+            record_failure(email, error)
+        sent, failed = 0, len(batch)
+    else:
+        try:
+            sent, failed = send_batch(batch, connection)
+        finally:
+            connection.close()
+    record_results(batch, leased_until)
+    return sent, failed
@@ -0,0 +1,272 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import Q, TextField, Value
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Comment, Review, SearchEntry, Title
+
+TOKEN_RE = re.compile(r'\w+')
+# Вес совпадения в заголовке относительно текста для индекса в памяти.
+HEADING_WEIGHT = 2
+
+
+def document(kind, obj):
+    """Поля поискового документа для объекта."""
+    if kind == SearchEntry.TITLE:
+        return {'title_id': obj.pk, 'heading': obj.name,
+                'body': obj.description}
+    if kind == SearchEntry.REVIEW:
+        return {'review_id': obj.pk, 'body': obj.text}
+    return {'review_id': obj.review_id, 'comment_id': obj.pk,
+            'body': obj.text}
+
+
+def is_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def vector(heading, body):
+    """tsvector: заголовок с весом A, текст с весом B."""
+    config = settings.SEARCH_CONFIG
+    return (
+        SearchVector(Value(heading, output_field=TextField()),
+                     weight='A', config=config)
+        + SearchVector(Value(body, output_field=TextField()),
+                       weight='B', config=config)
+    )
+
+
+def column_vector():
+    """tsvector по колонкам документа, для пакетного обновления."""
+    config = settings.SEARCH_CONFIG
+    return (SearchVector('heading', weight='A', config=config)
+            + SearchVector('body', weight='B', config=config))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс в памяти процесса для СУБД без tsvector.
+    Загружается из таблицы документов при первом поиске и дальше
+    обновляется при сохранении и удалении объектов в этом процессе.
+    Ключ документа - пара (тип, id объекта).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.postings = defaultdict(dict)
+        self.documents = {}
+
+    def add(self, kind, object_id, heading, body):
+        key = (kind, object_id)
+        weights = Counter(tokenize(body))
+        for token in tokenize(heading):
+            weights[token] += HEADING_WEIGHT
+        with self.lock:
+            self.discard(key)
+            for token, weight in weights.items():
+                self.postings[token][key] = weight
+            self.documents[key] = tuple(weights)
+
+    def remove(self, kind, object_id):
+        with self.lock:
+            self.discard((kind, object_id))
+
+    def discard(self, key):
+        for token in self.documents.pop(key, ()):
+            self.postings[token].pop(key, None)
+
+    def load(self):
+        if self.loaded:
+            return
+        entries = SearchEntry.objects.values_list(
+            'kind', 'object_id', 'heading', 'body'
+        )
+        for entry in entries.iterator():
+            self.add(*entry)
+        self.loaded = True
+
+    def reset(self):
+        with self.lock:
+            self.loaded = False
+            self.postings.clear()
+            self.documents.clear()
+
+    def search(self, query, kind=None):
+        """Ранжирование tf-idf: список ((тип, id), ранг) по убыванию."""
+        self.load()
+        scores = Counter()
+        with self.lock:
+            total = len(self.documents) or 1
+            for token in set(tokenize(query)):
+                postings = self.postings.get(token, {})
+                idf = math.log(1 + total / (len(postings) or 1))
+                for key, weight in postings.items():
+                    if kind is None or key[0] == kind:
+                        scores[key] += (weight * idf
+                                        / math.sqrt(len(self.documents[key])))
+        return sorted(scores.items(),
+                      key=lambda item: (-item[1], item[0][0], -item[0][1]))
+
+
+memory_index = InvertedIndex()
+
+
+class RankedResults:
+    """
+    Результаты поиска в памяти для пагинатора:
+    строки документов читаются из БД только для запрошенного среза.
+    """
+
+    def __init__(self, ranked):
+        self.ranked = ranked
+
+    def __len__(self):
+        return len(self.ranked)
+
+    def __getitem__(self, index):
+        ranked = self.ranked[index]
+        keys = Q(pk__in=[])
+        for (kind, object_id), _ in ranked:
+            keys |= Q(kind=kind, object_id=object_id)
+        entries = {
+            (entry.kind, entry.object_id): entry
+            for entry in SearchEntry.objects.select_related('review')
+            .filter(keys)
+        }
+        results = []
+        for key, rank in ranked:
+            # Документы, удалённые другим процессом, остаются в его индексе.
+            entry = entries.get(key)
+            if entry is not None:
+                entry.rank = rank
+                results.append(entry)
+        return results
+
+
+def search(query, kind=None):
+    """Документы, подходящие под запрос, по убыванию релевантности."""
+    if not is_postgresql():
+        return RankedResults(memory_index.search(query, kind))
+    search_query = SearchQuery(
+        query, config=settings.SEARCH_CONFIG, search_type='websearch'
+    )
+    entries = SearchEntry.objects.filter(vector=search_query)
+    if kind is not None:
+        entries = entries.filter(kind=kind)
+    return (entries.select_related('review')
+            .annotate(rank=SearchRank('vector', search_query))
+            .order_by('-rank', '-id'))
+
+
+def index_object(kind, obj):
+    """Создаёт или обновляет поисковый документ объекта."""
+    fields = document(kind, obj)
+    if is_postgresql():
+        fields['vector'] = vector(fields.get('heading', ''), fields['body'])
+    entries = SearchEntry.objects.filter(kind=kind, object_id=obj.pk)
+    if not entries.update(**fields):
+        SearchEntry.objects.create(kind=kind, object_id=obj.pk, **fields)
+    if not is_postgresql() and memory_index.loaded:
+        memory_index.add(
+            kind, obj.pk, fields.get('heading', ''), fields['body']
+        )
+
+
+def unindex_object(kind, obj):
+    """Удаляет поисковый документ удалённого объекта."""
+    SearchEntry.objects.filter(kind=kind, object_id=obj.pk).delete()
+    if not is_postgresql():
+        memory_index.remove(kind, obj.pk)
+
+
+def index_objects(kind, objs, batch_size=1000):
+    """Пересоздаёт документы пачки объектов, записанных bulk-запросами."""
+    ids = [obj.pk for obj in objs]
+    entries = SearchEntry.objects.filter(kind=kind, object_id__in=ids)
+    entries.delete()
+    SearchEntry.objects.bulk_create([
+        SearchEntry(kind=kind, object_id=obj.pk, **document(kind, obj))
+        for obj in objs
+    ], batch_size=batch_size)
+    if is_postgresql():
+        entries.update(vector=column_vector())
+    elif memory_index.loaded:
+        for obj in objs:
+            fields = document(kind, obj)
+            memory_index.add(
+                kind, obj.pk, fields.get('heading', ''), fields['body']
+            )
+
+
+def rebuild(batch_size=1000):
+    """Пересоздаёт все поисковые документы, возвращает их количество."""
+    SearchEntry.objects.all().delete()
+    sources = (
+        (SearchEntry.TITLE,
+         Title.objects.only('name', 'description')),
+        (SearchEntry.REVIEW, Review.objects.only('text')),
+        (SearchEntry.COMMENT, Comment.objects.only('review_id', 'text')),
+    )
+    total = 0
+    for kind, queryset in sources:
+        batch = []
+        for obj in queryset.order_by().iterator(chunk_size=batch_size):
+            batch.append(
+                SearchEntry(kind=kind, object_id=obj.pk, **document(kind, obj))
+            )
+            if len(batch) >= batch_size:
+                SearchEntry.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        SearchEntry.objects.bulk_create(batch)
+        total += len(batch)
+    if is_postgresql():
+        SearchEntry.objects.update(vector=column_vector())
+    memory_index.reset()
+    return total
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(SearchEntry.TITLE, instance)
+
+
+@receiver(post_save, sender=Review)
+def index_review(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(SearchEntry.REVIEW, instance)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(SearchEntry.COMMENT, instance)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    unindex_object(SearchEntry.TITLE, instance)
+
+
+@receiver(post_delete, sender=Review)
+def unindex_review(sender, instance, **kwargs):
+    unindex_object(SearchEntry.REVIEW, instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    unindex_object(SearchEntry.COMMENT, instance)
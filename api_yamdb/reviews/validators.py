@@ -2,6 +2,9 @@ from datetime import datetime
 
 from django.core.exceptions import ValidationError
 
+# Заняты маршрутами API: /genres/bulk/ перекрыл бы жанр со slug 'bulk'.
+RESERVED_SLUGS = ('bulk',)
+
 
 def validate_year(value):
     if value > datetime.now().year or value < 0:
@@ -13,3 +16,8 @@ def validate_score(value):
     if value < 1 or value > 10:
         raise ValidationError("Оценка публикации должна быть "
                               "в диапазоне от 1 до 10!")
+
+
+def validate_slug(value):
+    if value in RESERVED_SLUGS:
+        raise ValidationError(f"slug '{value}' зарезервирован.")